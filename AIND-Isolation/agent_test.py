@@ -3,10 +3,17 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import asyncio
+import json
+import os
+import tempfile
 import unittest
 
 import isolation
 import game_agent
+import sample_players
+
+from isolation.server import MatchServer, run_agent
 
 from importlib import reload
 
@@ -20,6 +27,141 @@ class IsolationTest(unittest.TestCase):
         self.player2 = "Player2"
         self.game = isolation.Board(self.player1, self.player2)
 
+    def test_large_board_moves(self):
+        game = isolation.Board(self.player1, self.player2, width=15, height=13)
+        self.assertEqual(len(game.get_blank_spaces()), 15 * 13)
+        game.apply_move((12, 14))
+        game.apply_move((0, 0))
+        self.assertEqual(sorted(game.get_legal_moves()), [(10, 13), (11, 12)])
+        game.apply_move((10, 13))
+        self.assertEqual(sorted(game.get_legal_moves()), [(1, 2), (2, 1)])
+        self.assertFalse(game.move_is_legal((12, 14)))
+        self.assertEqual(len(game.get_blank_spaces()), 15 * 13 - 3)
+
+    def test_queen_moves(self):
+        game = isolation.Board(self.player1, self.player2, width=5, height=4,
+                               movement="queen")
+        game.apply_move((0, 0))
+        game.apply_move((2, 2))
+        self.assertEqual(sorted(game.get_legal_moves()),
+                         [(0, 1), (0, 2), (0, 3), (0, 4), (1, 0), (1, 1),
+                          (2, 0), (3, 0)])
+        copy = game.forecast_move((0, 3))
+        self.assertEqual(copy.movement, isolation.QUEEN)
+        self.assertEqual(sorted(copy.get_legal_moves(self.player1)),
+                         [(0, 1), (0, 2), (0, 4), (1, 2), (1, 3), (1, 4),
+                          (2, 1), (2, 3), (3, 0), (3, 3)])
+
+    def test_territory(self):
+        self.game.apply_move((0, 0))
+        self.game.apply_move((6, 6))
+        self.assertEqual(self.game.get_territory(self.player1), (10, 10))
+        self.game.apply_move((1, 2))
+        own, opp = self.game.get_territory(self.player1)
+        self.assertEqual(self.game.get_territory(self.player2), (opp, own))
+        self.assertGreater(own, opp)
+        self.assertEqual(game_agent.territory_score(self.game, self.player1),
+                         float(own - opp))
+
+    def test_codec_round_trip(self):
+        self.game.apply_move((2, 3))
+        self.game.apply_move((0, 5))
+        self.game.apply_move((4, 4))
+        data = self.game.to_bytes()
+        self.assertEqual(len(data), 16)
+        game = isolation.Board.from_bytes(data, self.player1, self.player2)
+        self.assertEqual(game.to_string(), self.game.to_string())
+        self.assertEqual(game.hash(), self.game.hash())
+        self.assertEqual(game.active_player, self.player2)
+        self.assertEqual(game.move_count, 3)
+        self.assertEqual(sorted(game.get_legal_moves()),
+                         sorted(self.game.get_legal_moves()))
+
+    def test_distinct_opening_moves(self):
+        self.assertEqual(len(self.game.get_distinct_moves()), 10)
+        self.game.apply_move((3, 3))
+        self.assertEqual(len(self.game.get_distinct_moves()), 9)
+        self.game.apply_move((0, 1))
+        self.assertEqual(sorted(self.game.get_distinct_moves()),
+                         sorted(self.game.get_legal_moves()))
+
+
+class SlowPlayer(sample_players.RandomPlayer):
+    """Player that always takes longer than the time limit to move. """
+
+    def get_move(self, game, time_left):
+        while time_left() > -100:
+            pass
+        return sample_players.RandomPlayer.get_move(self, game, time_left)
+
+
+class MatchServerTest(unittest.TestCase):
+    """Games played through the asyncio match server on localhost"""
+
+    def play(self, server, players):
+        async def run():
+            await server.start()
+            try:
+                return await asyncio.gather(*[
+                    run_agent(player, port=server.port, name=name)
+                    for name, player in players])
+            finally:
+                server.close()
+        return asyncio.run(run())
+
+    def test_concurrent_games(self):
+        server = MatchServer(time_limit=1000, opening_moves=2)
+        players = [("random{}".format(i), sample_players.RandomPlayer())
+                   for i in range(40)]
+        outcomes = self.play(server, players)
+        self.assertEqual(len(server.results), 20)
+        self.assertEqual(sum(won for won, _ in outcomes), 20)
+        for result in server.results:
+            self.assertEqual(result.reason, "illegal move")
+            game = isolation.Board(1, 2)
+            for move in result.moves:
+                self.assertTrue(game.move_is_legal(tuple(move)))
+                game.apply_move(tuple(move))
+            self.assertEqual(result.winner, 2 if game.active_player == 1 else 1)
+
+    def test_timeout_is_preemptive(self):
+        server = MatchServer(time_limit=50)
+        outcomes = self.play(server, [("slow", SlowPlayer()),
+                                      ("random", sample_players.RandomPlayer())])
+        self.assertEqual(outcomes, [(False, "timeout"), (True, "timeout")])
+        self.assertEqual(server.results[0].winner, 2)
+        self.assertEqual(server.results[0].moves, [])
+
+    def test_waiting_agent_disconnects(self):
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        server = MatchServer(time_limit=1000, results_path=path)
+
+        async def run():
+            await server.start()
+            try:
+                _, writer = await asyncio.open_connection(port=server.port)
+                writer.write(b"HELLO ghost\n")
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+                await asyncio.sleep(0.1)
+                return await asyncio.wait_for(asyncio.gather(*[
+                    run_agent(sample_players.RandomPlayer(), port=server.port,
+                              name=name) for name in ("first", "second")]), 10)
+            finally:
+                server.close()
+        try:
+            outcomes = asyncio.run(run())
+            with open(path) as f:
+                results = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+        self.assertEqual(sorted(won for won, _ in outcomes), [False, True])
+        self.assertEqual(len(results), 1)
+        self.assertEqual((results[0]["player_1"], results[0]["player_2"]),
+                         ("first", "second"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,232 @@
+"""Measure the search speed of the game agents on boards of increasing size.
+
+Every benchmark runs fixed-depth alpha-beta searches from a set of random
+positions and counts each game state expanded through `Board.forecast_move`,
+so the results show how the nodes searched per second scale with the area of
+the board for each movement model. The move generation benchmark times
+`Board.get_legal_moves()` alone, and the opening benchmark shows how much the
+symmetry-aware `Board.get_distinct_moves()` reduces the first-move branching
+factor. The heuristic benchmarks compare the cost per evaluation and the
+match win rate of `territory_score` against `improved_score`, and the codec
+benchmark compares `Board.to_bytes()` with pickling the whole board.
+"""
+import argparse
+import pickle
+import random
+import timeit
+
+from isolation import Board, MOVEMENTS
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer, territory_score
+
+BOARD_SIZES = [7, 9, 11, 13, 15]
+NUM_POSITIONS = 20  # number of random positions searched on each board size
+SEARCH_DEPTH = 3  # depth of the fixed-depth alpha-beta searches
+RANDOM_MOVES = 6  # random moves played to reach each benchmark position
+MOVE_GEN_CALLS = 20000  # calls to get_legal_moves() per move generation run
+EVAL_CALLS = 5000  # heuristic evaluations per cost measurement
+NUM_MATCHES = 10  # pairs of matches played to measure the win rate
+TIME_LIMIT = 150  # number of milliseconds per move in the win rate matches
+
+HEURISTICS = [("Improved", improved_score), ("Territory", territory_score)]
+
+
+class CountingBoard(Board):
+    """Board that counts the number of states expanded during search. """
+    nodes = 0
+
+    def forecast_move(self, move):
+        CountingBoard.nodes += 1
+        return Board.forecast_move(self, move)
+
+
+def random_positions(player_1, player_2, width, height, movement, count,
+                     num_moves, seed=0):
+    """Return a list of boards reached by playing random moves from an empty
+    board, skipping any game that ends before `num_moves` moves are played.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = CountingBoard(player_1, player_2, width=width, height=height,
+                             movement=movement)
+        for _ in range(num_moves):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        else:
+            positions.append(game)
+    return positions
+
+
+def search_speed(player, positions, depth):
+    """Run a fixed-depth alpha-beta search for the player from every position
+    and return the number of nodes expanded and the elapsed time in seconds.
+    """
+    player.time_left = lambda: float("inf")
+    CountingBoard.nodes = 0
+    start = timeit.default_timer()
+    for game in positions:
+        player.alphabeta(game, depth)
+    return CountingBoard.nodes, timeit.default_timer() - start
+
+
+def benchmark_board_sizes(sizes, movements, num_positions, depth):
+    """Print the nodes/sec of alpha-beta search for each board size. """
+    print("\n{:^9}{:^9}{:^9}{:^12}{:^12}{:^14}".format(
+        "Movement", "Board", "Area", "Nodes", "Seconds", "Nodes/sec"))
+    player = AlphaBetaPlayer(search_depth=depth, score_fn=improved_score)
+    for movement in movements:
+        for size in sizes:
+            # an even number of random moves leaves the searching player active
+            positions = random_positions(player, "Opponent", size, size,
+                                         movement, num_positions, RANDOM_MOVES)
+            nodes, elapsed = search_speed(player, positions, depth)
+            print("{:^9}{:^9}{:^9}{:^12}{:^12.3f}{:^14.0f}".format(
+                movement, "{0}x{0}".format(size), size * size, nodes,
+                elapsed, nodes / elapsed))
+
+
+def benchmark_move_generation(sizes, movements, num_positions):
+    """Print the number of legal move lists generated per second. """
+    print("\n{:^9}{:^9}{:^14}{:^14}".format(
+        "Movement", "Board", "Moves/call", "Calls/sec"))
+    for movement in movements:
+        for size in sizes:
+            positions = random_positions("Player1", "Player2", size, size,
+                                         movement, num_positions, RANDOM_MOVES)
+            calls = MOVE_GEN_CALLS // len(positions)
+            num_moves = 0
+            start = timeit.default_timer()
+            for game in positions:
+                for _ in range(calls):
+                    num_moves += len(game.get_legal_moves())
+            elapsed = timeit.default_timer() - start
+            total_calls = calls * len(positions)
+            print("{:^9}{:^9}{:^14.1f}{:^14.0f}".format(
+                movement, "{0}x{0}".format(size), num_moves / total_calls,
+                total_calls / elapsed))
+
+
+def benchmark_heuristic_cost(sizes, movements, num_positions):
+    """Print the average time in microseconds of one heuristic evaluation. """
+    print("\n{:^9}{:^9}".format("Movement", "Board") +
+          ''.join('{:^13}'.format(name) for name, _ in HEURISTICS))
+    for movement in movements:
+        for size in sizes:
+            positions = random_positions("Player1", "Player2", size, size,
+                                         movement, num_positions, RANDOM_MOVES)
+            calls = EVAL_CALLS // len(positions)
+            costs = []
+            for _, score_fn in HEURISTICS:
+                start = timeit.default_timer()
+                for game in positions:
+                    for _ in range(calls):
+                        score_fn(game, "Player1")
+                elapsed = timeit.default_timer() - start
+                costs.append(1e6 * elapsed / (calls * len(positions)))
+            print("{:^9}{:^9}".format(movement, "{0}x{0}".format(size)) +
+                  ''.join('{:^13.1f}'.format(cost) for cost in costs))
+
+
+def benchmark_win_rate(movements, num_matches):
+    """Print the win rate of an alpha-beta agent using each heuristic against
+    one using `improved_score`, in fair matches from random openings with
+    each agent playing first once.
+    """
+    print("\n{:^9}".format("Movement") +
+          ''.join('{:^13}'.format(name) for name, _ in HEURISTICS))
+    for movement in movements:
+        win_rates = []
+        for _, score_fn in HEURISTICS:
+            test_agent = AlphaBetaPlayer(score_fn=score_fn)
+            base_agent = AlphaBetaPlayer(score_fn=improved_score)
+            wins = 0
+            for _ in range(num_matches):
+                games = [Board(test_agent, base_agent, movement=movement),
+                         Board(base_agent, test_agent, movement=movement)]
+                for _ in range(2):
+                    move = random.choice(games[0].get_legal_moves())
+                    for game in games:
+                        game.apply_move(move)
+                for game in games:
+                    winner, _, _ = game.play(time_limit=TIME_LIMIT)
+                    wins += winner is test_agent
+            win_rates.append(100. * wins / (2 * num_matches))
+        print("{:^9}".format(movement) +
+              ''.join('{:^13}'.format("{:.1f}%".format(rate))
+                      for rate in win_rates))
+
+
+def benchmark_codec(sizes, num_positions):
+    """Print the serialized size of a board as bytes and as a pickle that
+    includes its players, and the time to decode each.
+    """
+    print("\n{:^9}{:^12}{:^14}{:^12}{:^14}".format(
+        "Board", "Bytes", "Decode (us)", "Pickle", "Unpickle (us)"))
+    players = (AlphaBetaPlayer(), AlphaBetaPlayer())
+    for size in sizes:
+        positions = random_positions(players[0], players[1], size, size,
+                                     "knight", num_positions, RANDOM_MOVES)
+        encoded = [game.to_bytes() for game in positions]
+        pickled = [pickle.dumps(game) for game in positions]
+        start = timeit.default_timer()
+        for data in encoded:
+            Board.from_bytes(data, *players)
+        decode_time = timeit.default_timer() - start
+        start = timeit.default_timer()
+        for data in pickled:
+            pickle.loads(data)
+        unpickle_time = timeit.default_timer() - start
+        print("{:^9}{:^12}{:^14.1f}{:^12}{:^14.1f}".format(
+            "{0}x{0}".format(size), len(encoded[0]),
+            1e6 * decode_time / len(encoded), len(pickled[0]),
+            1e6 * unpickle_time / len(pickled)))
+
+
+def benchmark_openings(sizes):
+    """Print the branching factor of the first two plies with and without
+    collapsing symmetric opening moves.
+    """
+    print("\n{:^9}{:^20}{:^20}".format("Board", "1st ply legal/dist",
+                                       "2nd ply legal/dist"))
+    for size in sizes:
+        game = Board("Player1", "Player2", width=size, height=size)
+        first = (len(game.get_legal_moves()), len(game.get_distinct_moves()))
+        game.apply_move((size // 2, size // 2))
+        second = (len(game.get_legal_moves()), len(game.get_distinct_moves()))
+        print("{:^9}{:^20}{:^20}".format(
+            "{0}x{0}".format(size), "{} / {}".format(*first),
+            "{} / {}".format(*second)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Isolation search " +
+                                     "speed across board sizes.")
+    parser.add_argument('-s', '--sizes', nargs="+", type=int,
+                        default=BOARD_SIZES, help="Board sizes to benchmark.")
+    parser.add_argument('-n', '--positions', type=int, default=NUM_POSITIONS,
+                        help="Number of random positions per board size.")
+    parser.add_argument('-d', '--depth', type=int, default=SEARCH_DEPTH,
+                        help="Fixed search depth for alpha-beta.")
+    parser.add_argument('-m', '--movements', nargs="+", choices=sorted(MOVEMENTS),
+                        default=sorted(MOVEMENTS),
+                        help="Movement models to benchmark.")
+    parser.add_argument('--matches', type=int, default=NUM_MATCHES,
+                        help="Pairs of matches played per heuristic to " +
+                        "measure the win rate (0 to skip).")
+    args = parser.parse_args()
+
+    benchmark_board_sizes(args.sizes, args.movements, args.positions,
+                          args.depth)
+    benchmark_move_generation(args.sizes, args.movements, args.positions)
+    benchmark_openings(args.sizes)
+    benchmark_codec(args.sizes, args.positions)
+    benchmark_heuristic_cost(args.sizes, args.movements, args.positions)
+    if args.matches:
+        benchmark_win_rate(args.movements, args.matches)
+
+
+if __name__ == "__main__":
+    main()
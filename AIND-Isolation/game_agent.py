@@ -103,6 +103,38 @@ def custom_score_3(game, player):
 
     return float((y2-y1) + (x2-x1) + (opp_moves- own_moves)) 
 
+def territory_score(game, player):
+    """
+    The territory evaluation function, counts the blank cells each player can
+    reach before the other following the moves of the pieces, rather than a
+    straight-line distance between them, and scores the difference.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game (i.e., an object corresponding to
+        one of the player objects `game.__player_1__` or `game.__player_2__`.)
+
+    Returns
+    -------
+    float
+        The heuristic value of the current game state to the specified player.
+    """
+
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    own_cells, opp_cells = game.get_territory(player)
+
+    return float(own_cells - opp_cells)
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -236,7 +268,7 @@ class MinimaxPlayer(IsolationPlayer):
             if terminal_test(game) or depth == 0: 
                 return self.score(game, self)
             v = float("inf")
-            for m in game.get_legal_moves():
+            for m in game.get_distinct_moves():
                 v = min(v, max_value(game.forecast_move(m), depth-1))
             return v
 
@@ -246,14 +278,14 @@ class MinimaxPlayer(IsolationPlayer):
             if terminal_test(game) or depth == 0:
                 return self.score(game, self)
             v = float("-inf")
-            for m in game.get_legal_moves():
+            for m in game.get_distinct_moves():
                 v = max(v, min_value(game.forecast_move(m), depth-1))
             return v
 
         max_v = float("-inf")
         best_move = (-1,-1)
 
-        for m in game.get_legal_moves():
+        for m in game.get_distinct_moves():
             min_v = min_value(game.forecast_move(m), depth-1)
             if min_v > max_v:
                 max_v = min_v
@@ -374,7 +406,7 @@ class AlphaBetaPlayer(IsolationPlayer):
                 return self.score(game, self)
 
             v = float("-inf")
-            for m in game.get_legal_moves():
+            for m in game.get_distinct_moves():
                 v = max(v, min_value(game.forecast_move(m), alpha, beta, depth-1))
                 if v >= beta:
                     return v
@@ -389,7 +421,7 @@ class AlphaBetaPlayer(IsolationPlayer):
                 return self.score(game, self)
 
             v = float("inf")
-            for m in game.get_legal_moves():
+            for m in game.get_distinct_moves():
                 v = min(v, max_value(game.forecast_move(m), alpha, beta, depth-1))
                 if v <= alpha:
                     return v
@@ -398,7 +430,7 @@ class AlphaBetaPlayer(IsolationPlayer):
         
         best_action = (-1, -1)
 
-        for move in game.get_legal_moves():
+        for move in game.get_distinct_moves():
             v = min_value(game.forecast_move(move), alpha, beta, depth-1)
             if v > alpha:
                 alpha = v
@@ -7,5 +7,7 @@ location is blocked for the rest of the game. The first player with no
 legal moves loses, and the opponent is declared the winner.
 """
 
-# Make the Board class available at the root of the module for imports
+# Make the Board class and the movement models available at the root of the
+# module for imports
 from .isolation import Board
+from .movement import KNIGHT, QUEEN, MOVEMENTS
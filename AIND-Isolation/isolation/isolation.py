@@ -1,22 +1,82 @@
 """
 This file contains the `Board` class, which implements the rules for the
 game Isolation as described in lecture, modified so that the players move
-like knights in chess rather than queens.
+like knights in chess rather than queens. The original queen-move variant is
+available by passing `movement=QUEEN` (see movement.py).
 
 You MAY use and modify this class, however ALL function signatures must
 remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
+import struct
 import timeit
-from copy import copy
+
+from .movement import KNIGHT, MOVEMENTS
 
 TIME_LIMIT_MILLIS = 150
 
+# Lookup tables for each board size, shared by every Board of that size
+_TABLES = {}
+
+# Serialized board header: width, height, movement code and initiative flags,
+# move count, and the cell index of player 1 and player 2 (0xFFFF if the
+# player has not moved); the bitmask of blocked cells follows the header
+_CODEC_HEADER = struct.Struct("<BBBHHH")
+_CODEC_NOT_MOVED = 0xFFFF
+# Movement models by serialized code; only ever append to this list
+_CODEC_MOVEMENTS = ["knight", "queen"]
+
+
+def _get_tables(width, height):
+    """Return the precomputed tables for a board size, building them the
+    first time that size is requested.
+    """
+    key = (width, height)
+    tables = _TABLES.get(key)
+    if tables is None:
+        tables = _TABLES[key] = _BoardTables(width, height)
+    return tables
+
+
+class _BoardTables(object):
+    """Precomputed cell and symmetry tables for a `width` x `height` board.
+
+    Cells are numbered `row + col * height`, and each cell is a bit in an
+    integer bitmask; Python integers span as many machine words as needed,
+    so the same representation works for any board size.
+
+    Attributes
+    ----------
+    coords : list<(int, int)>
+        The (row, column) coordinate pair of each cell index.
+
+    full_mask : int
+        Bitmask with one bit set for every cell on the board.
+
+    symmetries : list<list<int>>
+        Cell permutations for the reflections and rotations that map the
+        board onto itself; the identity permutation is always first.
+    """
+    def __init__(self, width, height):
+        size = width * height
+        self.coords = [(idx % height, idx // height) for idx in range(size)]
+        self.full_mask = (1 << size) - 1
+
+        h, w = height - 1, width - 1
+        transforms = [lambda r, c: (r, c), lambda r, c: (h - r, c),
+                      lambda r, c: (r, w - c), lambda r, c: (h - r, w - c)]
+        if width == height:
+            transforms += [lambda r, c: (c, r), lambda r, c: (w - c, h - r),
+                           lambda r, c: (c, h - r), lambda r, c: (w - c, r)]
+        self.symmetries = [[r + c * height for r, c in
+                            (f(*rc) for rc in self.coords)]
+                           for f in transforms]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
-    a knight in chess.
+    a knight in chess, or according to the movement model provided.
 
     Parameters
     ----------
@@ -33,27 +93,39 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    movement : `isolation.movement.Movement` or str (optional)
+        The movement model shared by both players, or the name of one of the
+        models in `MOVEMENTS` (e.g., "knight" or "queen").
     """
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    def __init__(self, player_1, player_2, width=7, height=7, movement=KNIGHT):
+        if isinstance(movement, str):
+            movement = MOVEMENTS[movement]
         self.width = width
         self.height = height
+        self.movement = movement
         self.move_count = 0
         self._player_1 = player_1
         self._player_2 = player_2
         self._active_player = player_1
         self._inactive_player = player_2
+        self._tables = _get_tables(width, height)
+        self._move_tables = movement.get_tables(width, height)
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # The board state is a bitmask of the blocked cells, the initiative
+        # (0 for player 1, 1 for player 2), and the cell index of the last
+        # move of each player
+        self._blocked = 0
+        self._initiative = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        return hash((self._blocked, self._initiative,
+                     self._p1_loc, self._p2_loc))
 
     @property
     def active_player(self):
@@ -92,13 +164,69 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
-        new_board.move_count = self.move_count
-        new_board._active_player = self._active_player
-        new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        # Every attribute is either immutable or shared between boards of the
+        # same size, so a shallow copy of the instance dict is a deep copy
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
         return new_board
 
+    def to_bytes(self):
+        """Serialize the game state into a compact byte string.
+
+        The board size, movement model, move count, initiative, both player
+        locations and the blocked cells are packed into a 9-byte header and a
+        bitmask of one bit per cell (16 bytes in total for a 7x7 board). The
+        player objects are not included, so the result is cheap to send to
+        worker processes; use `Board.from_bytes()` to rebuild the board.
+
+        Returns
+        -------
+        bytes
+            The serialized game state.
+        """
+        flags = _CODEC_MOVEMENTS.index(self.movement.name) << 1
+        header = _CODEC_HEADER.pack(
+            self.width, self.height, flags | self._initiative, self.move_count,
+            _CODEC_NOT_MOVED if self._p1_loc is None else self._p1_loc,
+            _CODEC_NOT_MOVED if self._p2_loc is None else self._p2_loc)
+        num_bytes = (self.width * self.height + 7) // 8
+        return header + self._blocked.to_bytes(num_bytes, "little")
+
+    @classmethod
+    def from_bytes(cls, data, player_1, player_2):
+        """Rebuild a board serialized by `Board.to_bytes()`.
+
+        Parameters
+        ----------
+        data : bytes
+            The serialized game state.
+
+        player_1 : object
+            The object to register as the first player of the game.
+
+        player_2 : object
+            The object to register as the second player of the game.
+
+        Returns
+        -------
+        isolation.Board
+            A board in the serialized game state bound to the given players.
+        """
+        width, height, flags, move_count, p1_loc, p2_loc = \
+            _CODEC_HEADER.unpack_from(data)
+        board = cls(player_1, player_2, width=width, height=height,
+                    movement=_CODEC_MOVEMENTS[flags >> 1])
+        board.move_count = move_count
+        board._blocked = int.from_bytes(data[_CODEC_HEADER.size:], "little")
+        board._initiative = flags & 1
+        if board._initiative:
+            board._active_player, board._inactive_player = player_2, player_1
+        if p1_loc != _CODEC_NOT_MOVED:
+            board._p1_loc = p1_loc
+        if p2_loc != _CODEC_NOT_MOVED:
+            board._p2_loc = p2_loc
+        return board
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -134,13 +262,12 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+                not self._blocked >> idx & 1)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        return self._mask_to_moves(self._tables.full_mask & ~self._blocked)
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -156,20 +283,21 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
+        idx = self._get_location_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._tables.coords[idx]
+
+    def _get_location_index(self, player):
+        """Return the cell index of the specified player, or None if the
+        player has not moved.
+        """
         if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
+            return self._p1_loc
         elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -188,7 +316,106 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        return self.__get_moves(self._get_location_index(player))
+
+    def get_distinct_moves(self, player=None):
+        """Return the legal moves for the specified player, keeping only one
+        move from each set of opening moves that are equivalent under a
+        reflection or rotation of the board.
+
+        Before a player has moved every blank cell is a legal move, but while
+        the position is symmetric many of those openings lead to identical
+        games. Collapsing them shrinks the branching factor of the opening
+        plies without changing the value of the search. Once the player has
+        moved this is the same as `get_legal_moves()`.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of distinct legal
+            moves for the player.
+        """
+        if player is None:
+            player = self.active_player
+        moves = self.get_legal_moves(player)
+        if self._get_location_index(player) != Board.NOT_MOVED:
+            return moves
+
+        symmetries = [perm for perm in self._tables.symmetries
+                      if self._is_symmetric_under(perm)]
+        if len(symmetries) == 1:
+            return moves
+
+        seen = set()
+        distinct_moves = []
+        for move in moves:
+            idx = move[0] + move[1] * self.height
+            orbit = min(perm[idx] for perm in symmetries)
+            if orbit not in seen:
+                seen.add(orbit)
+                distinct_moves.append(move)
+        return distinct_moves
+
+    def _is_symmetric_under(self, perm):
+        """Test whether a cell permutation maps the current game state (both
+        player locations and every blocked cell) onto itself.
+        """
+        for idx in (self._p1_loc, self._p2_loc):
+            if idx != Board.NOT_MOVED and perm[idx] != idx:
+                return False
+        mask = self._blocked
+        while mask:
+            bit = mask & -mask
+            if not self._blocked >> perm[bit.bit_length() - 1] & 1:
+                return False
+            mask ^= bit
+        return True
+
+    def get_territory(self, player):
+        """Count the blank cells that each player can reach before the other.
+
+        Runs a simultaneous breadth-first search of the move graph from both
+        player locations. Each frontier is a bitmask that the movement model
+        expands by one move at a time, so every level of the search costs a
+        handful of integer operations regardless of how many cells it holds.
+        Cells that both players reach at the same distance belong to neither
+        player, and a player that has not moved yet claims no cells.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int)
+            The number of cells the player reaches first, and the number of
+            cells its opponent reaches first.
+        """
+        own_idx = self._get_location_index(player)
+        opp_idx = self._get_location_index(self.get_opponent(player))
+        own_front = 0 if own_idx == Board.NOT_MOVED else 1 << own_idx
+        opp_front = 0 if opp_idx == Board.NOT_MOVED else 1 << opp_idx
+
+        free = self._tables.full_mask & ~self._blocked
+        expand = self.movement.expand
+        tables = self._move_tables
+        own_seen, opp_seen = own_front, opp_front
+        own_cells = opp_cells = 0
+        while own_front or opp_front:
+            own_front = expand(tables, own_front, free) & ~own_seen
+            opp_front = expand(tables, opp_front, free) & ~opp_seen
+            own_cells |= own_front & ~(opp_seen | opp_front)
+            opp_cells |= opp_front & ~(own_seen | own_front)
+            own_seen |= own_front
+            opp_seen |= opp_front
+        return bin(own_cells).count("1"), bin(opp_cells).count("1")
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -200,10 +427,12 @@ class Board(object):
             the active player on the board.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        if self._active_player == self._player_2:
+            self._p2_loc = idx
+        else:
+            self._p1_loc = idx
+        self._blocked |= 1 << idx
+        self._initiative ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
@@ -247,21 +476,30 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
-        """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+    def __get_moves(self, idx):
+        """Generate the list of possible moves from the cell index `idx`
+        according to the movement model of the board.
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        valid_moves = self._mask_to_moves(self.movement.move_mask(
+            self._move_tables, idx, self._blocked))
         random.shuffle(valid_moves)
         return valid_moves
 
+    def _mask_to_moves(self, mask):
+        """Convert a bitmask of cells into a list of (row, column) pairs in
+        ascending cell index order.
+        """
+        coords = self._tables.coords
+        moves = []
+        while mask:
+            bit = mask & -mask
+            moves.append(coords[bit.bit_length() - 1])
+            mask ^= bit
+        return moves
+
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
         return self.to_string()
@@ -271,8 +509,8 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._p1_loc
+        p2_loc = self._p2_loc
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
@@ -282,7 +520,7 @@ class Board(object):
             out += prefix.format(i) + ' | '
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
+                if not self._blocked >> idx & 1:
                     out += ' '
                 elif p1_loc == idx:
                     out += symbols[0]
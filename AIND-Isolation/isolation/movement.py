@@ -0,0 +1,183 @@
+"""
+This file contains the movement models that define how a piece moves on an
+Isolation `Board`. A movement model turns the cell index of a piece and the
+bitmask of blocked cells into a bitmask of the cells the piece can move to,
+using lookup tables that are precomputed once for each board size. It can
+also expand a whole set of cells by one move at once, which lets searches
+over the move graph (such as the territory evaluation of the board) advance
+an entire breadth-first frontier with a few integer operations.
+
+Cells are numbered `row + col * height`, matching the layout of the `Board`.
+Every movement model must be symmetric under reflections and rotations of the
+board, because `Board.get_distinct_moves()` relies on that symmetry.
+"""
+
+
+class MoveTables(object):
+    """Lookup tables of a movement model for one board size.
+
+    Attributes
+    ----------
+    moves : list
+        Per-cell move data used by `Movement.move_mask()`.
+
+    shifts : list<(int, int)>
+        One `(source_mask, shift)` pair per direction of movement, where
+        `source_mask` holds the cells that stay on the board after a step in
+        that direction, and `shift` is the change in cell index of the step.
+    """
+    def __init__(self, moves, shifts):
+        self.moves = moves
+        self.shifts = shifts
+
+
+def _direction_shifts(directions, width, height):
+    """Return the `(source_mask, shift)` pair for each (row, column) step. """
+    shifts = []
+    for dr, dc in directions:
+        source_mask = 0
+        for c in range(max(0, -dc), min(width, width - dc)):
+            for r in range(max(0, -dr), min(height, height - dr)):
+                source_mask |= 1 << (r + c * height)
+        shifts.append((source_mask, dr + dc * height))
+    return shifts
+
+
+def _shift(mask, shift):
+    """Shift every cell in a bitmask by a (possibly negative) index offset. """
+    return mask << shift if shift > 0 else mask >> -shift
+
+
+class Movement(object):
+    """Base class for movement models.
+
+    Subclasses provide `build_tables()`, which precomputes the lookup tables
+    for a board size, `move_mask()`, which uses those tables to find the
+    cells reachable from one cell, and `expand()`, which finds the cells
+    reachable in one move from any cell in a set.
+    """
+    name = None
+
+    def __init__(self):
+        self._tables = {}
+
+    def get_tables(self, width, height):
+        """Return the lookup tables for a board size, building them the first
+        time that size is requested so that every board shares them.
+        """
+        key = (width, height)
+        tables = self._tables.get(key)
+        if tables is None:
+            tables = self._tables[key] = self.build_tables(width, height)
+        return tables
+
+    def build_tables(self, width, height):
+        """Precompute the per-cell lookup tables for a board size. """
+        raise NotImplementedError
+
+    def move_mask(self, tables, idx, blocked):
+        """Return the bitmask of cells that a piece on cell `idx` can move to
+        when the cells in the `blocked` bitmask are occupied.
+        """
+        raise NotImplementedError
+
+    def expand(self, tables, frontier, free):
+        """Return the bitmask of `free` cells that a piece standing on any
+        cell of the `frontier` bitmask could move to, treating every cell
+        outside `free` as blocked.
+        """
+        raise NotImplementedError
+
+
+class KnightMovement(Movement):
+    """Moves along an L-shape like a knight in chess, jumping over any blocked
+    cells in between. The per-cell tables hold the mask of knight targets.
+    """
+    name = "knight"
+    DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+
+    def build_tables(self, width, height):
+        masks = []
+        for c in range(width):
+            for r in range(height):
+                mask = 0
+                for dr, dc in self.DIRECTIONS:
+                    if 0 <= r + dr < height and 0 <= c + dc < width:
+                        mask |= 1 << (r + dr + (c + dc) * height)
+                masks.append(mask)
+        return MoveTables(masks, _direction_shifts(self.DIRECTIONS, width,
+                                                   height))
+
+    def move_mask(self, tables, idx, blocked):
+        return tables.moves[idx] & ~blocked
+
+    def expand(self, tables, frontier, free):
+        reach = 0
+        for source_mask, shift in tables.shifts:
+            reach |= _shift(frontier & source_mask, shift)
+        return reach & free
+
+
+class QueenMovement(Movement):
+    """Slides any distance horizontally, vertically or diagonally like a queen
+    in chess, stopping before the first blocked cell.
+
+    The per-cell tables hold a list of `(ray, ascending)` pairs: `ray`
+    is the mask of every cell in one direction up to the edge of the board,
+    and `ascending` is True when the cell indexes increase along the ray.
+    The nearest blocker on an ascending ray is therefore its lowest blocked
+    bit, and on a descending ray its highest one, so each ray is cut at the
+    blocker with a couple of integer operations instead of a cell-by-cell
+    scan.
+    """
+    name = "queen"
+    DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1),
+                  (0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def build_tables(self, width, height):
+        rays = []
+        for c in range(width):
+            for r in range(height):
+                cell_rays = []
+                for dr, dc in self.DIRECTIONS:
+                    ray = 0
+                    nr, nc = r + dr, c + dc
+                    while 0 <= nr < height and 0 <= nc < width:
+                        ray |= 1 << (nr + nc * height)
+                        nr, nc = nr + dr, nc + dc
+                    if ray:
+                        cell_rays.append((ray, dr + dc * height > 0))
+                rays.append(cell_rays)
+        return MoveTables(rays, _direction_shifts(self.DIRECTIONS, width,
+                                                  height))
+
+    def move_mask(self, tables, idx, blocked):
+        mask = 0
+        for ray, ascending in tables.moves[idx]:
+            hits = ray & blocked
+            if not hits:
+                mask |= ray
+            elif ascending:
+                mask |= ray & ((hits & -hits) - 1)
+            else:
+                mask |= ray & ~((1 << hits.bit_length()) - 1)
+        return mask
+
+    def expand(self, tables, frontier, free):
+        # slide the whole frontier one step at a time in each direction,
+        # dropping cells as they run into a blocked cell or the board edge
+        reach = 0
+        for source_mask, shift in tables.shifts:
+            ray = _shift(frontier & source_mask, shift) & free
+            while ray:
+                reach |= ray
+                ray = _shift(ray & source_mask, shift) & free
+        return reach
+
+
+KNIGHT = KnightMovement()
+QUEEN = QueenMovement()
+
+# Movement models by name
+MOVEMENTS = {movement.name: movement for movement in (KNIGHT, QUEEN)}
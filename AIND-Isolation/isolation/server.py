@@ -0,0 +1,432 @@
+"""
+This file contains an asyncio match server that hosts many games of Isolation
+at once between agents running in other processes, and the client coroutine
+that connects an agent object (anything with a `get_move()` method) to it.
+
+Agents connect over TCP or a Unix socket and are paired into games in the
+order they arrive, with the first waiting agent that has a different name.
+Unlike `Board.play()`, which can only detect a timeout after a slow agent
+finally returns, the server stops waiting for a move as soon as the time
+limit expires and ends the game immediately.
+
+Every message is one line of space separated ASCII fields:
+
+    agent  -> server    HELLO <name>
+    server -> agent     GAME <game id> <width> <height> <movement> <seat>
+    server -> agent     TURN <time limit ms> [<row>,<col> ...]
+    agent  -> server    MOVE <row> <col>
+    server -> agent     END <WIN|LOSS> <reason>
+
+`seat` is 1 for the player moving first and 2 otherwise. A TURN message
+lists every move applied to the board since the agent last moved (including
+any random opening moves), so the agent can keep its own copy of the board
+in sync. Agents with no legal moves reply `MOVE -1 -1`. The reason for the
+end of a game is "timeout", "forfeit" or "illegal move" as in `Board.play()`,
+or "disconnect" if the losing agent closed its connection.
+
+Run a server, and then any number of agent processes against it, with:
+
+    python -m isolation.server serve --port 8765 --games 100
+    python -m isolation.server agent --port 8765 --games 50 \\
+        --player game_agent:AlphaBetaPlayer
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import random
+import timeit
+
+from collections import Counter, namedtuple
+
+from .isolation import Board, TIME_LIMIT_MILLIS
+from .movement import KNIGHT, MOVEMENTS
+
+# Seconds a new connection has to introduce itself before it is dropped
+HANDSHAKE_TIMEOUT = 5.
+
+GameResult = namedtuple("GameResult", ["game_id", "player_1", "player_2",
+                                       "winner", "reason", "moves"])
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a message that does not follow the protocol. """
+    pass
+
+
+def _format_move(move):
+    return "{},{}".format(*move)
+
+
+def _parse_move(text):
+    row, col = text.split(",")
+    return int(row), int(col)
+
+
+async def _send(writer, *fields):
+    writer.write((" ".join(map(str, fields)) + "\n").encode("ascii"))
+    await writer.drain()
+
+
+async def _receive(reader, keyword):
+    """Read one message and return its fields after checking its keyword. """
+    line = await reader.readline()
+    if not line:
+        raise ConnectionResetError("connection closed by peer")
+    fields = line.decode("ascii").split()
+    if not fields or fields[0] != keyword:
+        raise ProtocolError("expected {}, got {!r}".format(keyword, line))
+    return fields[1:]
+
+
+class _Connection(object):
+    """A connected agent; used as the player object on the server boards. """
+
+    def __init__(self, name, reader, writer):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.finished = asyncio.Event()
+        # pending read that notices the agent leaving while it waits for an
+        # opponent; cancelled when the agent is paired
+        self.watch = None
+
+    async def send(self, *fields):
+        try:
+            await _send(self.writer, *fields)
+        except ConnectionError:
+            pass  # the game ends when the next move from this agent fails
+
+    def close(self):
+        self.writer.close()
+
+
+class MatchServer(object):
+    """Host games of Isolation between agents connected over sockets.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of each game board.
+
+    height : int (optional)
+        The number of rows of each game board.
+
+    movement : `isolation.movement.Movement` or str (optional)
+        The movement model used in every game.
+
+    time_limit : numeric (optional)
+        The maximum number of milliseconds an agent may take to reply to a
+        TURN message before it loses the game.
+
+    opening_moves : int (optional)
+        The number of random moves applied to each board before the agents
+        take over (e.g., 2 for the random openings used by tournament.py).
+
+    results_path : str (optional)
+        A file that each game result is appended to as a line of JSON.
+    """
+
+    def __init__(self, width=7, height=7, movement=KNIGHT,
+                 time_limit=TIME_LIMIT_MILLIS, opening_moves=0,
+                 results_path=None):
+        if isinstance(movement, str):
+            movement = MOVEMENTS[movement]
+        self.width = width
+        self.height = height
+        self.movement = movement
+        self.time_limit = time_limit
+        self.opening_moves = opening_moves
+        self.results_path = results_path
+        self.results = []
+        self._game_ids = itertools.count(1)
+        self._waiting = []
+        self._results_lock = asyncio.Lock()
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Start accepting agents on a TCP port, or on the Unix socket at
+        `path` if it is given, and return the `asyncio.Server`.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._accept,
+                                                           path=path)
+        else:
+            self._server = await asyncio.start_server(self._accept, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        """The TCP port the server is listening on. """
+        return self._server.sockets[0].getsockname()[1]
+
+    def close(self):
+        """Stop accepting new agents. """
+        self._server.close()
+
+    async def _accept(self, reader, writer):
+        try:
+            fields = await asyncio.wait_for(_receive(reader, "HELLO"),
+                                            HANDSHAKE_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError, ProtocolError,
+                UnicodeDecodeError):
+            writer.close()
+            return
+        conn = _Connection(" ".join(fields) or "anonymous", reader, writer)
+
+        while True:
+            opponent = next((waiting for waiting in self._waiting
+                             if waiting.name != conn.name), None)
+            if opponent is None:
+                await self._wait_for_opponent(conn)
+                return
+            self._waiting.remove(opponent)
+            # the game reads from the opponent's stream, so its pending read
+            # has to be gone first
+            opponent.watch.cancel()
+            await asyncio.wait([opponent.watch])
+            if opponent.watch.cancelled():
+                break
+            # the opponent left before it was paired; try the next one
+
+        try:
+            await self._play(opponent, conn)
+        finally:
+            opponent.close()
+            conn.close()
+            opponent.finished.set()
+
+    async def _wait_for_opponent(self, conn):
+        """Keep a connection open until an opponent arrives and the game
+        between them is over, or drop it if the agent leaves first.
+        """
+        self._waiting.append(conn)
+        # an agent sends nothing until its first TURN, so the read only
+        # returns if the agent disconnects (or breaks the protocol)
+        conn.watch = asyncio.ensure_future(conn.reader.read(1))
+        try:
+            await asyncio.wait([conn.watch])
+        finally:
+            if conn in self._waiting:
+                self._waiting.remove(conn)
+                conn.watch.cancel()
+        if conn.watch.cancelled():
+            await conn.finished.wait()
+        else:
+            conn.close()
+
+    async def _play(self, player_1, player_2):
+        """Play a game between two connected agents and record its result. """
+        game_id = next(self._game_ids)
+        board = Board(player_1, player_2, width=self.width, height=self.height,
+                      movement=self.movement)
+        for seat, conn in enumerate((player_1, player_2), 1):
+            await conn.send("GAME", game_id, self.width, self.height,
+                            self.movement.name, seat)
+
+        # moves applied to the board that each agent has not been sent yet
+        unseen = {player_1: [], player_2: []}
+        history = []
+        for _ in range(self.opening_moves):
+            move = random.choice(board.get_legal_moves())
+            board.apply_move(move)
+            history.append(list(move))
+            unseen[player_1].append(move)
+            unseen[player_2].append(move)
+
+        while True:
+            player = board.active_player
+            legal_player_moves = board.get_legal_moves()
+            await player.send("TURN", self.time_limit,
+                              *map(_format_move, unseen[player]))
+            unseen[player] = []
+            try:
+                fields = await asyncio.wait_for(
+                    _receive(player.reader, "MOVE"), self.time_limit / 1000.)
+                move = (int(fields[0]), int(fields[1]))
+            except asyncio.TimeoutError:
+                reason = "timeout"
+                break
+            except (ConnectionError, ProtocolError, UnicodeDecodeError):
+                reason = "disconnect"
+                break
+            except (ValueError, IndexError):
+                move = Board.NOT_MOVED
+
+            if move not in legal_player_moves:
+                reason = "forfeit" if legal_player_moves else "illegal move"
+                break
+
+            board.apply_move(move)
+            history.append(list(move))
+            unseen[board.active_player].append(move)
+
+        winner = board.inactive_player
+        await winner.send("END", "WIN", reason)
+        await board.active_player.send("END", "LOSS", reason)
+
+        result = GameResult(game_id, player_1.name, player_2.name,
+                            1 if winner is player_1 else 2, reason, history)
+        self.results.append(result)
+        if self.results_path is not None:
+            async with self._results_lock:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._append_result, result)
+        return result
+
+    def _append_result(self, result):
+        with open(self.results_path, "a") as f:
+            f.write(json.dumps(result._asdict()) + "\n")
+
+
+async def run_agent(player, host="127.0.0.1", port=None, path=None,
+                    name="agent"):
+    """Connect an agent to a match server and play one game.
+
+    The agent's `get_move()` runs in a worker thread, so one process can play
+    several games at once without blocking the connections of the others.
+
+    Parameters
+    ----------
+    player : object
+        An object with a get_move() function, called with a copy of the game
+        board and a `time_left` function exactly as in `Board.play()`.
+
+    host, port : str, int (optional)
+        The TCP address of the server.
+
+    path : str (optional)
+        The Unix socket of the server; used instead of the TCP address.
+
+    name : str (optional)
+        The name reported to the server and recorded in the game results.
+
+    Returns
+    ----------
+    (bool, str)
+        Whether the agent won, and the reason the game ended.
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    time_millis = lambda: 1000 * timeit.default_timer()
+    try:
+        await _send(writer, "HELLO", name)
+        _, width, height, movement, seat = await _receive(reader, "GAME")
+        opponent = object()
+        players = (player, opponent) if seat == "1" else (opponent, player)
+        board = Board(*players, width=int(width), height=int(height),
+                      movement=movement)
+
+        while True:
+            line = await reader.readline()
+            fields = line.decode("ascii").split()
+            if not fields:
+                raise ConnectionResetError("connection closed by server")
+            if fields[0] == "END":
+                return fields[1] == "WIN", fields[2]
+            if fields[0] != "TURN":
+                raise ProtocolError("unexpected message {!r}".format(line))
+
+            for move in map(_parse_move, fields[2:]):
+                board.apply_move(move)
+            time_limit = float(fields[1])
+            move_start = time_millis()
+            time_left = lambda: time_limit - (time_millis() - move_start)
+            move = await loop.run_in_executor(None, player.get_move,
+                                              board.copy(), time_left)
+            if move is None or not board.move_is_legal(move):
+                move = (-1, -1)
+            try:
+                await _send(writer, "MOVE", *move)
+            except ConnectionError:
+                continue  # the server has already ended the game
+            if move != (-1, -1):
+                board.apply_move(move)
+    finally:
+        writer.close()
+
+
+def _load_player(spec):
+    """Create a player from a "module:callable" spec such as
+    "game_agent:AlphaBetaPlayer".
+    """
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+async def _serve(args):
+    server = MatchServer(args.width, args.height, args.movement,
+                         args.time_limit, args.opening_moves, args.results)
+    await server.start(args.host, args.port, args.unix)
+    print("Listening on {}".format(args.unix or "{}:{}".format(args.host,
+                                                               server.port)))
+    while args.games is None or len(server.results) < args.games:
+        await asyncio.sleep(0.1)
+    server.close()
+
+    wins = Counter()
+    for result in server.results:
+        wins[result.player_1 if result.winner == 1 else result.player_2] += 1
+    print("Played {} games".format(len(server.results)))
+    for name, count in wins.most_common():
+        print("  {:<20} {} wins".format(name, count))
+    print("Endings: {}".format(dict(Counter(r.reason for r in server.results))))
+
+
+async def _play_agents(args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def play_one():
+        async with semaphore:
+            return await run_agent(_load_player(args.player), args.host,
+                                   args.port, args.unix, args.name)
+
+    results = await asyncio.gather(*[play_one() for _ in range(args.games)])
+    print("{}: won {} of {} games".format(
+        args.name, sum(won for won, _ in results), len(results)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host or join concurrent " +
+                                     "Isolation games over sockets.")
+    parser.add_argument("mode", choices=["serve", "agent"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Use this Unix socket path instead " +
+                        "of TCP.")
+    parser.add_argument("--games", type=int, help="Number of games to " +
+                        "host (default: run forever) or to play.")
+    group = parser.add_argument_group("serve")
+    group.add_argument("--width", type=int, default=7)
+    group.add_argument("--height", type=int, default=7)
+    group.add_argument("--movement", choices=sorted(MOVEMENTS),
+                       default=KNIGHT.name)
+    group.add_argument("--time-limit", type=int, default=TIME_LIMIT_MILLIS,
+                       help="Milliseconds allowed per move.")
+    group.add_argument("--opening-moves", type=int, default=0,
+                       help="Random moves applied before the agents play.")
+    group.add_argument("--results", help="Append each result as JSON to " +
+                       "this file.")
+    group = parser.add_argument_group("agent")
+    group.add_argument("--player", default="sample_players:RandomPlayer",
+                       help="module:callable that creates the player.")
+    group.add_argument("--name", default="agent")
+    group.add_argument("--concurrency", type=int, default=1,
+                       help="Number of games this process plays at once. " +
+                       "Searching agents share one interpreter, so start " +
+                       "more processes instead of raising this for them.")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        asyncio.run(_serve(args))
+    else:
+        args.games = args.games or 1
+        asyncio.run(_play_agents(args))
+
+
+if __name__ == "__main__":
+    main()
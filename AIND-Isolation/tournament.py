@@ -21,10 +21,11 @@ from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
-                        custom_score_2, custom_score_3)
+                        custom_score_2, custom_score_3, territory_score)
 
 NUM_MATCHES =  50  #5 number of matches against each opponent
 TIME_LIMIT = 200  #150 # number of milliseconds before timeout
+MOVEMENT = "knight"  # how the pieces move: "knight" or "queen"
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -48,8 +49,8 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
     forfeit_count = 0
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
+        games = sum([[Board(cpu_agent.player, agent.player, movement=MOVEMENT),
+                      Board(agent.player, cpu_agent.player, movement=MOVEMENT)]
                     for agent in test_agents], [])
 
         # initialize all games with a random move and response
@@ -132,7 +133,8 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
         Agent(AlphaBetaPlayer(score_fn=custom_score), "Basic"), #AB_Custom"), 
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "Lucky"), #"AB_Custom_2"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "Coward")#"AB_Custom_3")
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "Coward"),#"AB_Custom_3")
+        Agent(AlphaBetaPlayer(score_fn=territory_score), "Territory")
     ]
 
     # Define a collection of agents to compete against the test agents
@@ -34,6 +34,56 @@ def conjunctive_sentence(pos_list, neg_list):
     return associate('&', clauses)
 
 
+class BitState(int):
+    """ state as an int whose bit i is set when fluent_map[i] holds
+
+    len() is the number of fluents, as for the T/F string encoding, and str()
+    gives the T/F string.
+    """
+
+    def __new__(cls, value: int, size: int):
+        state = int.__new__(cls, value)
+        state.size = size
+        return state
+
+    def __getnewargs__(self):
+        return int(self), self.size
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return "".join('T' if self >> idx & 1 else 'F' for idx in range(self.size))
+
+
+def fluent_mask(fluents: list, fluent_index: dict) -> (int, int):
+    """ bitmask of fluents using a mapping of fluents to bit positions
+
+    :param fluents: list of fluents
+    :param fluent_index: dict of fluent to its position in the fluent map
+    :return: the mask of the mapped fluents, and the number of fluents that are not mapped
+    """
+    mask = 0
+    missing = 0
+    for fluent in fluents:
+        if fluent in fluent_index:
+            mask |= 1 << fluent_index[fluent]
+        else:
+            missing += 1
+    return mask, missing
+
+
+def encode_state_bits(fs: FluentState, fluent_map: list) -> BitState:
+    """ encode fluents to a BitState using mapping
+
+    :param fs: FluentState object
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: BitState with bit i set when fluent_map[i] is in fs.pos
+    """
+    mask, _ = fluent_mask(fs.pos, dict((fluent, idx) for idx, fluent in enumerate(fluent_map)))
+    return BitState(mask, len(fluent_map))
+
+
 def encode_state(fs: FluentState, fluent_map: list) -> str:
     """ encode fluents to a string of T/F using mapping
 
@@ -50,19 +100,96 @@ def encode_state(fs: FluentState, fluent_map: list) -> str:
     return "".join(state_tf)
 
 
-def decode_state(state: str, fluent_map: list) -> FluentState:
-    """ decode string of T/F as fluent per mapping
+def decode_state(state, fluent_map: list) -> FluentState:
+    """ decode string of T/F, or int bitset, as fluent per mapping
 
-    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents,
+        or int (e.g. BitState) with bit i set when fluent_map[i] is positive
     :param fluent_map: ordered list of possible fluents for the problem
     :return: fs: FluentState object
 
     lengths of state string and fluent_map list must be the same
     """
     fs = FluentState([], [])
+    if isinstance(state, int):
+        for idx, fluent in enumerate(fluent_map):
+            if state >> idx & 1:
+                fs.pos.append(fluent)
+            else:
+                fs.neg.append(fluent)
+        return fs
     for idx, char in enumerate(state):
         if char == 'T':
             fs.pos.append(fluent_map[idx])
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+class SuccessorGenerator():
+    """ decision tree over fluent bits that finds the items, e.g. actions, whose
+    preconditions hold in a bitset state
+
+    Every node tests one fluent: items with a positive precondition on it go
+    down the true branch, items with a negative precondition down the false
+    branch and the others down the don't-care branch, and an item is stored
+    at the node where its preconditions run out. A lookup only follows the
+    branches that agree with the state, so its cost grows with the number of
+    applicable items and the depth of the tree rather than with the number
+    of items.
+    """
+
+    def __init__(self, entries):
+        """
+
+        :param entries: list of (precondition positive mask, precondition negative mask, item)
+        """
+        self.root = self._build(list(entries), 0)
+
+    def _build(self, entries, start):
+        if not entries:
+            return None
+        immediate = []
+        rest = []
+        lowest = 0
+        for pos, neg, item in entries:
+            remaining = (pos | neg) >> start << start
+            if remaining:
+                bit = remaining & -remaining
+                if not lowest or bit < lowest:
+                    lowest = bit
+                rest.append((pos, neg, item))
+            else:
+                immediate.append(item)
+        if not rest:
+            return (immediate, 0, None, None, None)
+        true, false, dontcare = [], [], []
+        for entry in rest:
+            if entry[0] & lowest:
+                true.append(entry)
+            elif entry[1] & lowest:
+                false.append(entry)
+            else:
+                dontcare.append(entry)
+        start = lowest.bit_length()
+        return (immediate, lowest,
+                self._build(true, start), self._build(false, start), self._build(dontcare, start))
+
+    def applicable(self, state: int) -> list:
+        """ items whose preconditions hold in state
+
+        :param state: int bitset of the positive fluents
+        :return: list of items, in no particular order
+        """
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            immediate, bit, true, false, dontcare = node
+            found.extend(immediate)
+            if bit:
+                stack.append(true if state & bit else false)
+                stack.append(dontcare)
+        return found
@@ -1,13 +1,12 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, Problem,
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state,
+    BitState, FluentState, SuccessorGenerator, encode_state_bits, fluent_mask,
 )
-from my_planning_graph import PlanningGraph
+from my_planning_graph import BitPlanningGraph
 
 from functools import lru_cache
 
@@ -28,12 +27,42 @@ class AirCargoProblem(Problem):
             literal fluents required for goal test
         """
         self.state_map = initial.pos + initial.neg
-        self.initial_state_TF = encode_state(initial, self.state_map)
+        self.fluent_index = dict((fluent, idx) for idx, fluent in enumerate(self.state_map))
+        self.initial_state_TF = encode_state_bits(initial, self.state_map)
         Problem.__init__(self, self.initial_state_TF, goal=goal)
         self.cargos = cargos
         self.planes = planes
         self.airports = airports
+        self.goal_mask, self.goal_missing = fluent_mask(goal, self.fluent_index)
+        self.action_masks = {}
         self.actions_list = self.get_actions()
+        self.successors = SuccessorGenerator(
+            self.compile_action(action)[:2] + (idx,) for idx, action in enumerate(self.actions_list))
+
+    def compile_action(self, action: Action) -> tuple:
+        """ Return the bitmasks of an action over the fluents of the state map,
+        computed once per action name and arguments
+
+        A positive precondition outside of the state map can never hold, so it
+        is mapped to a bit past the end of the states; other fluents outside of
+        the state map are ignored, as they are by the T/F string encoding.
+
+        :param action: Action object
+        :return: tuple of (precondition positive mask, precondition negative mask,
+            add mask, remove mask)
+        """
+        key = (action.name, action.args)
+        masks = self.action_masks.get(key)
+        if masks is None:
+            pre_pos, missing = fluent_mask(action.precond_pos, self.fluent_index)
+            if missing:
+                pre_pos |= 1 << len(self.state_map)
+            masks = (pre_pos,
+                     fluent_mask(action.precond_neg, self.fluent_index)[0],
+                     fluent_mask(action.effect_add, self.fluent_index)[0],
+                     fluent_mask(action.effect_rem, self.fluent_index)[0])
+            self.action_masks[key] = masks
+        return masks
 
     def get_actions(self):
         """
@@ -113,31 +142,18 @@ class AirCargoProblem(Problem):
 
         return load_actions() + unload_actions() + fly_actions()
 
-    def actions(self, state: str) -> list:
+    def actions(self, state: BitState) -> list:
         """ Return the actions that can be executed in the given state.
 
-        :param state: str
-            state represented as T/F string of mapped fluents (state variables)
-            e.g. 'FTTTFF'
-        :return: list of Action objects
+        :param state: BitState
+            state represented as an int with bit i set when fluent i of the
+            state map holds
+        :return: list of Action objects, in the order of actions_list
         """
-        possible_actions = []
-
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in kb.clauses:
-                    is_possible = False
-            for clause in action.precond_neg:
-                if clause in kb.clauses:
-                    is_possible = False
-            if is_possible:
-                possible_actions.append(action)
-        return possible_actions
-
-    def result(self, state: str, action: Action):
+        actions_list = self.actions_list
+        return [actions_list[idx] for idx in sorted(self.successors.applicable(state))]
+
+    def result(self, state: BitState, action: Action):
         """ Return the state that results from executing the given
         action in the given state. The action must be one of
         self.actions(state).
@@ -146,40 +162,16 @@ class AirCargoProblem(Problem):
         :param action: Action applied
         :return: resulting state after action
         """
-        new_state = FluentState([], [])
-        old_state = decode_state(state, self.state_map)
-
-        for fluent in old_state.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-
-        for fluent in old_state.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)
+        _, _, add, rem = self.compile_action(action)
+        return BitState(state & ~rem | add, len(self.state_map))
 
-        return encode_state(new_state, self.state_map)
-
-
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: BitState) -> bool:
         """ Test the state to see if goal is reached
 
-        :param state: str representing state
+        :param state: BitState representing state
         :return: bool
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+        return not self.goal_missing and state & self.goal_mask == self.goal_mask
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
@@ -193,8 +185,8 @@ class AirCargoProblem(Problem):
         out from the current state in order to satisfy each individual goal
         condition.
         """
-        # requires implemented PlanningGraph class
-        pg = PlanningGraph(self, node.state)
+        # the literal levels do not depend on the mutexes, so they are skipped
+        pg = BitPlanningGraph(self, node.state, mutexes=False)
         pg_levelsum = pg.h_levelsum()
         return pg_levelsum
 
@@ -205,24 +197,9 @@ class AirCargoProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-
-        # A Knowledge base for propositional logic 
-
-        kb = PropKB()
-
-        # Removing all preconditions and all effects except those that are
-        # literals in the goal 
-
-        kb.tell(decode_state(node.state, self.state_map).pos_sentence())
-
-        # Count the minimum number of actions required such that the union of
-        # those actions effects satifies the goal. 
-
-        count = 0
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                count += 1
-        return count
+        # Every action adds a single fluent, so without preconditions each goal
+        # fluent that does not hold yet takes one action.
+        return bin(self.goal_mask & ~node.state).count('1') + self.goal_missing
 
 
 def air_cargo_p1() -> AirCargoProblem:
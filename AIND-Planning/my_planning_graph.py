@@ -1,3 +1,5 @@
+from weakref import WeakKeyDictionary
+
 from aimacode.planning import Action
 from aimacode.search import Problem
 from aimacode.utils import expr
@@ -556,3 +558,282 @@ class PlanningGraph():
                     break
 
         return level_sum
+
+
+def bits(mask: int):
+    """ positions of the set bits of mask, lowest first
+
+    :param mask: int
+    :return: generator of int
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PlanningGraphTables():
+    """ the ground actions of a problem compiled to literal bitsets for BitPlanningGraph
+
+    Literal 2 * i is fluent i holding and literal 2 * i + 1 is fluent i not
+    holding, so flipping the lowest bit of a literal negates it. The fluents are
+    those of the state map followed by any other fluent an action or goal
+    mentions; as in PlanningGraph, no literal of those is in the first level.
+    Actions 0 to len(actions_list) - 1 are the problem actions and action
+    len(actions_list) + l is the no-op of literal l.
+    """
+
+    def __init__(self, problem: Problem):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        """
+        self.fluents = list(problem.state_map)
+        self.num_state_fluents = len(self.fluents)
+        self.index = dict((fluent, idx) for idx, fluent in enumerate(self.fluents))
+        self.num_actions = len(problem.actions_list)
+        self.preconds = []
+        self.effects = []
+        for action in problem.actions_list:
+            self.preconds.append(self.literals(action.precond_pos, True) | self.literals(action.precond_neg, False))
+            self.effects.append(self.literals(action.effect_add, True) | self.literals(action.effect_rem, False))
+        self.goal = self.literals(problem.goal, True)
+
+    def literals(self, fluents: list, is_pos: bool) -> int:
+        """ literal bitset of fluents, adding the fluents that are not indexed yet
+
+        :param fluents: list of fluents
+        :param is_pos: bool, whether the literals are positive or negative
+        :return: int
+        """
+        mask = 0
+        for fluent in fluents:
+            if fluent not in self.index:
+                self.index[fluent] = len(self.fluents)
+                self.fluents.append(fluent)
+            mask |= 1 << (2 * self.index[fluent] + (0 if is_pos else 1))
+        return mask
+
+    def initial_literals(self, state) -> int:
+        """ literal bitset of a state of the problem
+
+        :param state: str of T/F or int bitset over the state map
+        :return: int
+        """
+        mask = 0
+        if isinstance(state, int):
+            for idx in range(self.num_state_fluents):
+                mask |= (1 if state >> idx & 1 else 2) << 2 * idx
+            return mask
+        for idx, char in enumerate(state):
+            mask |= (1 if char == 'T' else 2) << 2 * idx
+        return mask
+
+
+_TABLES = WeakKeyDictionary()
+
+
+class BitPlanningGraph():
+    """
+    A planning graph over the literal and action IDs of PlanningGraphTables,
+    with every level stored as a bitset.
+
+    The levels grow as in PlanningGraph: an action is in an A level when all of
+    its preconditions are in the S level before it, and no-ops carry every
+    literal forward. Mutexes follow the Russell-Norvig definitions, with
+    preconditions as the parents of an action, and are stored per level as one
+    bitset row per action or literal, so every test combines whole rows of
+    pairs at once. They do not restrict the levels, so the level sum heuristic
+    builds the graph without them.
+
+    The levels and level sums are those of PlanningGraph, but the mutexes are
+    not: PlanningGraph makes every literal of an S level a parent of each
+    action of the next A level, so once a level holds a literal and its
+    negation, competing needs makes every pair of its actions mutex. Here only
+    the preconditions of an action are its parents, which finds fewer
+    mutexes; e.g. Have(Cake) and Eaten(Cake) are mutex at S2 of have_cake in
+    PlanningGraph but not here, since Bake(Cake) and Noop(Eaten(Cake)) can be
+    taken together.
+    """
+
+    def __init__(self, problem: Problem, state, serial_planning=True, mutexes=True):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        :param state: str of T/F or int bitset of the fluents of problem.state_map
+        :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+        :param mutexes: bool (whether or not to compute the mutexes)
+        Instance variable calculated:
+            s_levels: list of int literal bitsets, one per S level
+            a_levels: list of int action bitsets, one per A level
+            s_mutex: list per S level of the literal mutex rows, indexed by literal
+            a_mutex: list per A level of dict of action to its action mutex row
+            literal_levels: dict of literal to the first S level holding it
+        """
+        tables = _TABLES.get(problem)
+        if tables is None:
+            tables = _TABLES[problem] = PlanningGraphTables(problem)
+        self.problem = problem
+        self.tables = tables
+        self.serial = serial_planning
+        self.s_levels = []
+        self.a_levels = []
+        self.s_mutex = []
+        self.a_mutex = []
+        self.literal_levels = {}
+        self.create_graph(tables.initial_literals(state), mutexes)
+
+    def create_graph(self, literals: int, mutexes: bool):
+        """ build the levels until two S levels are the same, including their mutexes when computed
+
+        :param literals: int bitset of the literals of S0
+        :param mutexes: bool
+        """
+        tables = self.tables
+        noop_base = tables.num_actions
+        self.s_levels.append(literals)
+        for literal in bits(literals):
+            self.literal_levels[literal] = 0
+        if mutexes:
+            # the only mutexes of S0 are between a literal and its negation
+            self.s_mutex.append([(1 << (l ^ 1)) & literals for l in range(2 * len(tables.fluents))])
+        level = 0
+        while True:
+            actions = literals << noop_base
+            new_literals = literals
+            for action, precond in enumerate(tables.preconds):
+                if literals & precond == precond:
+                    actions |= 1 << action
+                    new_literals |= tables.effects[action]
+            self.a_levels.append(actions)
+            level += 1
+            self.s_levels.append(new_literals)
+            for literal in bits(new_literals & ~literals):
+                self.literal_levels[literal] = level
+            if not mutexes:
+                if new_literals == literals:
+                    return
+                literals = new_literals
+                continue
+            self.a_mutex.append(self.action_mutexes(actions, self.s_mutex[-1]))
+            self.s_mutex.append(self.literal_mutexes(new_literals, actions, self.a_mutex[-1]))
+            if new_literals == literals and self.s_mutex[-1] == self.s_mutex[-2]:
+                return
+            literals = new_literals
+
+    def action_effects(self, action: int) -> int:
+        """ literal bitset of the effects of an action ID, no-ops included """
+        if action < self.tables.num_actions:
+            return self.tables.effects[action]
+        return 1 << (action - self.tables.num_actions)
+
+    def action_preconds(self, action: int) -> int:
+        """ literal bitset of the preconditions of an action ID, no-ops included """
+        if action < self.tables.num_actions:
+            return self.tables.preconds[action]
+        return 1 << (action - self.tables.num_actions)
+
+    def action_mutexes(self, actions: int, literal_mutex: list) -> dict:
+        """ mutex rows of the actions of an A level
+
+        Inconsistent effects, interference, competing needs and, for a serial
+        graph, any two non-persistent actions.
+
+        :param actions: int bitset of the actions of the level
+        :param literal_mutex: list of the literal mutex rows of the S level before
+        :return: dict of action to the bitset of the actions it is mutex with
+        """
+        needing = {}
+        achieving = {}
+        for action in bits(actions):
+            bit = 1 << action
+            for literal in bits(self.action_preconds(action)):
+                needing[literal] = needing.get(literal, 0) | bit
+            for literal in bits(self.action_effects(action)):
+                achieving[literal] = achieving.get(literal, 0) | bit
+        needed = 0
+        for literal in needing:
+            needed |= 1 << literal
+        real = actions & ((1 << self.tables.num_actions) - 1)
+        rows = {}
+        for action in bits(actions):
+            row = 0
+            for literal in bits(self.action_effects(action)):
+                row |= achieving.get(literal ^ 1, 0) | needing.get(literal ^ 1, 0)
+            # the literals mutex with a precondition of the action, as one row
+            needs_mutex = 0
+            for literal in bits(self.action_preconds(action)):
+                row |= achieving.get(literal ^ 1, 0)
+                needs_mutex |= literal_mutex[literal]
+            # competing needs: the actions needing any of those literals
+            for literal in bits(needs_mutex & needed):
+                row |= needing[literal]
+            if self.serial and action < self.tables.num_actions:
+                row |= real
+            rows[action] = row & ~(1 << action)
+        return rows
+
+    def literal_mutexes(self, literals: int, actions: int, action_mutex: dict) -> list:
+        """ mutex rows of the literals of an S level
+
+        Negation and inconsistent support: two literals are mutex when every
+        action achieving one is mutex with every action achieving the other.
+
+        :param literals: int bitset of the literals of the level
+        :param actions: int bitset of the actions of the A level before
+        :param action_mutex: dict of the action mutex rows of the A level before
+        :return: list of the literal mutex rows, indexed by literal
+        """
+        achieving = {}
+        for action in bits(actions):
+            bit = 1 << action
+            for literal in bits(self.action_effects(action)):
+                achieving[literal] = achieving.get(literal, 0) | bit
+        num_actions = self.tables.num_actions
+        effects = self.tables.effects
+        real = (1 << num_actions) - 1
+        rows = [0] * (2 * len(self.tables.fluents))
+        for literal in bits(literals):
+            # actions mutex with every achiever of the literal
+            common = actions
+            for action in bits(achieving[literal]):
+                common &= action_mutex[action]
+            # literals with an achiever outside of common can be had together
+            # with this one; all the others are only supported by common
+            others = actions & ~common
+            # the no-op of literal l is action num_actions + l and achieves l
+            supported = others >> num_actions
+            for action in bits(others & real):
+                supported |= effects[action]
+            rows[literal] = (literals & ~supported | (1 << (literal ^ 1))) & literals & ~(1 << literal)
+        return rows
+
+    def literal_level(self, fluent, is_pos=True):
+        """ first S level holding a literal
+
+        :param fluent: expr fluent
+        :param is_pos: bool, whether the literal is positive or negative
+        :return: int level, or None if no level holds the literal
+        """
+        idx = self.tables.index.get(fluent)
+        if idx is None:
+            return None
+        return self.literal_levels.get(2 * idx + (0 if is_pos else 1))
+
+    def is_mutex(self, level: int, literal1: int, literal2: int) -> bool:
+        """ whether two literal IDs are mutex in an S level computed with mutexes
+
+        :param level: int S level
+        :param literal1: int literal ID
+        :param literal2: int literal ID
+        :return: bool
+        """
+        return bool(self.s_mutex[level][literal1] >> literal2 & 1)
+
+    def h_levelsum(self) -> int:
+        """The sum of the level costs of the individual goals (admissible if goals independent)
+
+        Goals that no level holds add nothing, as in PlanningGraph.h_levelsum.
+
+        :return: int
+        """
+        literal_levels = self.literal_levels
+        return sum(literal_levels.get(literal, 0) for literal in bits(self.tables.goal))
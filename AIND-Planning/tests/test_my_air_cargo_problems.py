@@ -5,8 +5,11 @@ sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
 from aimacode.planning import Action
 from aimacode.utils import expr
 from aimacode.search import Node
+import random
 import unittest
-from lp_utils import decode_state
+from lp_utils import (
+    BitState, SuccessorGenerator, decode_state, encode_state, encode_state_bits, fluent_mask,
+)
 from my_air_cargo_problems import (
     air_cargo_p1, air_cargo_p2, air_cargo_p3,
 )
@@ -71,6 +74,20 @@ class TestAirCargoMethods(unittest.TestCase):
         #     print("{}{}".format(action.name, action.args))
         self.assertEqual(len(self.p1.actions(self.p1.initial)), 4)
 
+    def test_AC_actions_match_preconditions(self):
+        # the successor generator agrees with a direct precondition check
+        p2 = air_cargo_p2()
+        states = [p2.initial]
+        for state in states[:50]:
+            expected = []
+            for action in p2.actions_list:
+                fs = decode_state(state, p2.state_map)
+                if all(f in fs.pos for f in action.precond_pos) and \
+                        not any(f in fs.pos for f in action.precond_neg):
+                    expected.append(action)
+            self.assertEqual(p2.actions(state), expected)
+            states.extend(p2.result(state, action) for action in expected)
+
     def test_AC_result(self):
         fs = decode_state(self.p1.result(self.p1.initial, self.act1), self.p1.state_map)
         self.assertTrue(expr('In(C1, P1)') in fs.pos)
@@ -80,5 +97,82 @@ class TestAirCargoMethods(unittest.TestCase):
         n = Node(self.p1.initial)
         self.assertEqual(self.p1.h_ignore_preconditions(n),2)
 
+
+class TestBitEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.p2 = air_cargo_p2()
+        self.random = random.Random(0)
+        self.act1 = Action(
+            expr('Load(C1, P1, SFO)'),
+            [[expr('At(C1, SFO)'), expr('At(P1, SFO)')], []],
+            [[expr('In(C1, P1)')], [expr('At(C1, SFO)')]]
+        )
+
+    def random_states(self, count):
+        size = len(self.p2.state_map)
+        return [BitState(self.random.getrandbits(size), size) for _ in range(count)]
+
+    def test_bit_state(self):
+        state = BitState(0b101, 4)
+        self.assertEqual(state, 5)
+        self.assertEqual(len(state), 4)
+        self.assertEqual(str(state), 'TFTF')
+
+    def test_fluent_mask(self):
+        index = {expr('At(C1, SFO)'): 0, expr('At(P1, SFO)'): 2}
+        fluents = [expr('At(P1, SFO)'), expr('In(C1, P1)'), expr('At(C1, SFO)')]
+        self.assertEqual(fluent_mask(fluents, index), (0b101, 1))
+        self.assertEqual(fluent_mask([], index), (0, 0))
+
+    def test_encode_decode(self):
+        fluent_map = self.p2.state_map
+        for state in self.random_states(20):
+            fs = decode_state(state, fluent_map)
+            self.assertEqual(len(fs.pos) + len(fs.neg), len(fluent_map))
+            encoded = encode_state_bits(fs, fluent_map)
+            self.assertEqual(encoded, state)
+            self.assertEqual(str(encoded), encode_state(fs, fluent_map))
+            self.assertEqual(decode_state(str(encoded), fluent_map).pos, fs.pos)
+
+    def test_compile_action(self):
+        index = self.p2.fluent_index
+        pre_pos, pre_neg, add, rem = self.p2.compile_action(self.act1)
+        self.assertEqual(pre_pos, 1 << index[expr('At(C1, SFO)')] | 1 << index[expr('At(P1, SFO)')])
+        self.assertEqual(pre_neg, 0)
+        self.assertEqual(add, 1 << index[expr('In(C1, P1)')])
+        self.assertEqual(rem, 1 << index[expr('At(C1, SFO)')])
+        # an unknown positive precondition can never hold
+        unknown = Action(expr('Fly(P1, SFO, XXX)'), [[expr('At(P1, XXX)')], []], [[], []])
+        self.assertEqual(self.p2.compile_action(unknown)[0], 1 << len(self.p2.state_map))
+
+    def test_goal_mask(self):
+        index = self.p2.fluent_index
+        self.assertEqual(self.p2.goal_mask, sum(1 << index[g] for g in self.p2.goal))
+        self.assertEqual(self.p2.goal_missing, 0)
+
+    def test_actions_match_preconditions(self):
+        for state in self.random_states(50):
+            fs = decode_state(state, self.p2.state_map)
+            expected = [action for action in self.p2.actions_list
+                        if all(f in fs.pos for f in action.precond_pos) and
+                        not any(f in fs.pos for f in action.precond_neg)]
+            self.assertEqual(self.p2.actions(state), expected)
+
+    def test_h_ignore_preconditions(self):
+        for state in self.random_states(50):
+            fs = decode_state(state, self.p2.state_map)
+            missing = sum(1 for g in self.p2.goal if g not in fs.pos)
+            self.assertEqual(self.p2.h_ignore_preconditions(Node(state)), missing)
+
+    def test_successor_generator(self):
+        entries = [(0b001, 0b000, 'a'), (0b011, 0b100, 'b'), (0b000, 0b010, 'c'), (0, 0, 'd')]
+        generator = SuccessorGenerator(entries)
+        for state in range(8):
+            expected = set(item for pos, neg, item in entries
+                           if state & pos == pos and not state & neg)
+            self.assertEqual(set(generator.applicable(state)), expected)
+        self.assertEqual(SuccessorGenerator([]).applicable(0), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,8 +7,10 @@ import unittest
 from aimacode.utils import expr
 from aimacode.planning import Action
 from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
+from lp_utils import decode_state
 from my_planning_graph import (
-    PlanningGraph, PgNode_a, PgNode_s, mutexify
+    BitPlanningGraph, PlanningGraph, PgNode_a, PgNode_s, bits, mutexify
 )
 
 
@@ -124,5 +126,75 @@ class TestPlanningGraphHeuristics(unittest.TestCase):
         self.assertEqual(self.pg.h_levelsum(), 1)
 
 
+class TestBitPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.pg = BitPlanningGraph(self.p, self.p.initial)
+
+    def literal(self, fluent, is_pos):
+        return 2 * self.pg.tables.index[expr(fluent)] + (0 if is_pos else 1)
+
+    def test_levels(self):
+        self.assertEqual(bin(self.pg.s_levels[0]).count('1'), 2)
+        self.assertEqual(bin(self.pg.s_levels[1]).count('1'), 4)
+        # Eat(Cake) and the two no-ops, then Bake(Cake) and the other two no-ops
+        self.assertEqual(bin(self.pg.a_levels[0]).count('1'), 3)
+        self.assertEqual(bin(self.pg.a_levels[1]).count('1'), 6)
+        self.assertEqual(self.pg.literal_level(expr('Have(Cake)')), 0)
+        self.assertEqual(self.pg.literal_level(expr('Eaten(Cake)')), 1)
+
+    def test_literal_mutexes(self):
+        have, eaten = self.literal('Have(Cake)', True), self.literal('Eaten(Cake)', True)
+        not_have, not_eaten = self.literal('Have(Cake)', False), self.literal('Eaten(Cake)', False)
+        self.assertTrue(self.pg.is_mutex(1, have, not_have))
+        self.assertTrue(self.pg.is_mutex(1, have, eaten))
+        self.assertTrue(self.pg.is_mutex(1, not_have, not_eaten))
+        self.assertFalse(self.pg.is_mutex(1, have, not_eaten))
+        self.assertFalse(self.pg.is_mutex(1, not_have, eaten))
+        # Bake(Cake) at A1 gives another way to have the cake once it is eaten
+        self.assertFalse(self.pg.is_mutex(2, have, eaten))
+
+    def test_air_cargo_mutexes(self):
+        # the bitset rows against the Russell-Norvig rules applied pair by pair
+        p1 = air_cargo_p1()
+        pg = BitPlanningGraph(p1, p1.initial)
+        fluents = pg.tables.fluents
+        actions = [(set((f, True) for f in a.precond_pos) | set((f, False) for f in a.precond_neg),
+                    set((f, True) for f in a.effect_add) | set((f, False) for f in a.effect_rem), True)
+                   for a in p1.actions_list]
+        actions += [(set([(f, is_pos)]), set([(f, is_pos)]), False) for f in fluents for is_pos in (True, False)]
+        fs = decode_state(p1.initial, p1.state_map)
+        literals = set((f, True) for f in fs.pos) | set((f, False) for f in fs.neg)
+        s_mutex = set((p, q) for p in literals for q in literals if p[0] == q[0] and p[1] != q[1])
+        for level in range(len(pg.s_levels)):
+            self.assertEqual(set((2 * fluents.index(f) + (0 if is_pos else 1)) for f, is_pos in literals),
+                             set(bits(pg.s_levels[level])))
+            self.assertEqual(s_mutex, set(((fluents[p // 2], p % 2 == 0), (fluents[q // 2], q % 2 == 0))
+                                          for p in bits(pg.s_levels[level])
+                                          for q in bits(pg.s_mutex[level][p])))
+            if level == len(pg.s_levels) - 1:
+                break
+            layer = [a for a in actions if a[0] <= literals]
+
+            def mutex(a, b):
+                negated = lambda literals: set((f, not is_pos) for f, is_pos in literals)
+                return (a[2] and b[2] or a[1] & negated(b[1]) or a[1] & negated(b[0]) or
+                        b[1] & negated(a[0]) or any((p, q) in s_mutex for p in a[0] for q in b[0]))
+            a_mutex = set((i, j) for i, a in enumerate(layer) for j, b in enumerate(layer) if i != j and mutex(a, b))
+            literals = set().union(*(a[1] for a in layer))
+            achievers = dict((p, [i for i, a in enumerate(layer) if p in a[1]]) for p in literals)
+            s_mutex = set((p, q) for p in literals for q in literals if p != q and
+                          all((i, j) in a_mutex for i in achievers[p] for j in achievers[q]))
+
+    def test_levelsum(self):
+        self.assertEqual(self.pg.h_levelsum(), 1)
+        p1 = air_cargo_p1()
+        state = p1.initial
+        for _ in range(4):
+            self.assertEqual(BitPlanningGraph(p1, state, mutexes=False).h_levelsum(),
+                             PlanningGraph(p1, state).h_levelsum())
+            state = p1.result(state, p1.actions(state)[-1])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,14 +7,73 @@ digits = '123456789'
 rows = 'ABCDEFGHI'
 
 
-def play(values_list):
+def square_position(x, y):
+    """Return the top left corner on the board of the square in column x and row y."""
+    if x in (0, 1, 2):  startX = (x * 57) + 38
+    if x in (3, 4, 5):  startX = (x * 57) + 99
+    if x in (6, 7, 8):  startX = (x * 57) + 159
+
+    if y in (0, 1, 2):  startY = (y * 57) + 35
+    if y in (3, 4, 5):  startY = (y * 57) + 100
+    if y in (6, 7, 8):  startY = (y * 57) + 165
+    return startX, startY
+
+
+def _number(string_number):
+    if len(string_number) > 1 or string_number == '' or string_number == '.':
+        return None
+    return int(string_number)
+
+
+class FrameWriter:
+    """Saves the rendered frames of a replay, as numbered PNG files in a directory
+    or as one animated GIF when the path ends in .gif (which needs Pillow)."""
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.count = 0
+        self.images = None
+        if path.lower().endswith('.gif'):
+            from PIL import Image
+            self.Image = Image
+            self.images = []
+        elif not os.path.isdir(path):
+            os.makedirs(path)
+
+    def add(self, screen):
+        if self.images is not None:
+            data = pygame.image.tostring(screen, 'RGB')
+            self.images.append(self.Image.frombytes('RGB', screen.get_size(), data))
+        else:
+            pygame.image.save(screen, os.path.join(self.path, 'frame_%05d.png' % self.count))
+        self.count += 1
+
+    def close(self):
+        if self.images:
+            self.images[0].save(self.path, save_all=True, append_images=self.images[1:],
+                                duration=int(1000 / self.fps), loop=0)
+
+
+def play(values_list, output=None, fps=5):
+    """Replay a sequence of values dictionaries on the board.
+
+    Only the squares whose value changed since the previous frame are redrawn, over
+    the matching piece of the background. With an output path the replay is headless:
+    it runs on SDL's dummy video driver, writes every frame to `output` (a directory
+    of PNG files, or a .gif file) as fast as it can, and returns instead of waiting
+    for the window to be closed.
+    """
+    if output is not None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
     pygame.init()
+    SudokuSquare.reset_cache()
 
 
     size = width, height = 700, 700
     screen = pygame.display.set_mode(size)
 
     background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+    writer = FrameWriter(output, fps) if output is not None else None
 
     clock = pygame.time.Clock()
 
@@ -22,37 +81,36 @@ def play(values_list):
     # a random number to fill in here or accept user
     # input for a duplicatable puzzle.
 
+    screen.blit(background_image, (0, 0))
+    pygame.display.flip()
+    shown = {}
+    editable = "N"
     for values in values_list:
         pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
+        dirty = []
         for y in range(9):
             for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                col = digits[x]
-                row = rows[y]
-                string_number = values[row + col]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(5)
+                box = rows[y] + digits[x]
+                number = _number(values[box])
+                if box in shown and shown[box] == number:
+                    continue
+                shown[box] = number
+                startX, startY = square_position(x, y)
+                area = pygame.Rect(startX, startY, 45, 40)
+                screen.blit(background_image, area, area)
+                SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y).draw()
+                dirty.append(area)
+
+        pygame.display.update(dirty)
+        if writer is not None:
+            writer.add(screen)
+        else:
+            clock.tick(fps)
+
+    if writer is not None:
+        writer.close()
+        pygame.quit()
+        return
 
     # leave game showing until closed by user
     while True:
@@ -63,4 +121,4 @@ def play(values_list):
 
 if __name__ == "__main__":
     main()
-    sys.exit()
\ No newline at end of file
+    sys.exit()
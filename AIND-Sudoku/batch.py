@@ -0,0 +1,174 @@
+"""Solve a stream of Sudoku puzzles across a pool of worker processes.
+
+Puzzles are read one 81-character grid per line from a file or stdin, with
+'.' for empty boxes; blank lines and lines starting with '#' are skipped. The
+puzzles are sent to the workers in chunks, and at most a fixed window of
+chunks is in flight at once, so memory stays bounded however long the input
+is. Solutions are written one per line in input order, with a line of '-'
+for a puzzle that has no solution. Throughput and per-puzzle latency
+percentiles are reported on stderr.
+
+    python batch.py puzzles.txt -o solutions.txt
+    cat puzzles.txt | python batch.py --engine dlx --workers 4
+"""
+import argparse
+import collections
+import math
+import os
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+import solution
+
+CHUNK_SIZE = 64  # puzzles per task sent to a worker
+WINDOW = 4  # chunks in flight per worker
+NO_SOLUTION = '-' * 81
+ENGINES = solution.ENGINES + ('numpy',)
+
+
+class LatencyHistogram(object):
+    """Histogram of latencies in logarithmic buckets, so that percentiles of
+    any number of samples can be estimated in constant memory.
+
+    Args:
+        resolution(float): the ratio between the bounds of consecutive buckets
+        smallest(float): the upper bound in seconds of the first bucket
+    """
+
+    def __init__(self, resolution=1.05, smallest=1e-6):
+        self.resolution = resolution
+        self.smallest = smallest
+        self.buckets = collections.Counter()
+        self.count = 0
+
+    def add(self, seconds):
+        bucket = 0
+        if seconds > self.smallest:
+            bucket = int(math.ceil(math.log(seconds / self.smallest, self.resolution)))
+        self.buckets[bucket] += 1
+        self.count += 1
+
+    def percentile(self, p):
+        """Return the upper bound in seconds of the bucket holding the p-th percentile. """
+        rank = max(1, int(math.ceil(self.count * p / 100.)))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return self.smallest * self.resolution ** bucket
+        return 0.
+
+
+def read_puzzles(stream):
+    """Yield the grids of a stream, skipping blank lines and comments. """
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def chunks(puzzles, size):
+    """Group an iterable of puzzles into lists of at most `size`. """
+    chunk = []
+    for grid in puzzles:
+        chunk.append(grid)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def solve_chunk(grids, engine):
+    """Solve a list of grids in a worker process.
+    Returns:
+        A list of (solution, seconds) pairs, where the solution is an 81-character
+        string or None when the grid is malformed or has no solution. The 'numpy'
+        engine solves the chunk as one batch, so each puzzle gets the average time.
+    """
+    if engine == 'numpy':
+        return solve_chunk_vectorized(grids)
+    results = []
+    for grid in grids:
+        start = timeit.default_timer()
+        values = len(grid) == len(solution.boxes) and solution.solve(grid, engine=engine)
+        elapsed = timeit.default_timer() - start
+        results.append((''.join(values[box] for box in solution.boxes) if values else None, elapsed))
+    return results
+
+
+def solve_chunk_vectorized(grids):
+    """Solve a list of grids as one batch of the NumPy engine, like solve_chunk. """
+    start = timeit.default_timer()
+    valid = [grid for grid in grids if len(grid) == len(solution.boxes)]
+    solved = iter(solution.solve_batch(valid))
+    results = [next(solved) if len(grid) == len(solution.boxes) else False for grid in grids]
+    elapsed = (timeit.default_timer() - start) / len(grids)
+    return [(''.join(values[box] for box in solution.boxes) if values else None, elapsed)
+            for values in results]
+
+
+def solve_stream(puzzles, output, engine='propagation', workers=None, chunk_size=CHUNK_SIZE,
+                 window=WINDOW):
+    """Solve an iterable of grids on a process pool and write the solutions to
+    `output` in input order.
+    Returns:
+        The number of puzzles solved and a LatencyHistogram of all puzzles.
+    """
+    workers = workers or os.cpu_count() or 1
+    histogram = LatencyHistogram()
+    solved = 0
+    pending = collections.deque()
+
+    def write(results):
+        for values, elapsed in results:
+            output.write((values or NO_SOLUTION) + '\n')
+            histogram.add(elapsed)
+        return sum(1 for values, _ in results if values)
+
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk in chunks(puzzles, chunk_size):
+            pending.append(pool.submit(solve_chunk, chunk, engine))
+            if len(pending) >= workers * window:
+                solved += write(pending.popleft().result())
+        while pending:
+            solved += write(pending.popleft().result())
+    return solved, histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a file of Sudoku puzzles, one per line.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="File of puzzles, or - to read from stdin (default).")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the solutions to, or - for stdout (default).")
+    parser.add_argument('-e', '--engine', choices=ENGINES, default='propagation',
+                        help="Solver backend; numpy propagates each chunk as one batch.")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-c', '--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Puzzles per task sent to a worker.")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    start = timeit.default_timer()
+    try:
+        solved, histogram = solve_stream(read_puzzles(source), output, args.engine,
+                                         args.workers, args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = timeit.default_timer() - start
+
+    sys.stderr.write("{} puzzles, {} solved in {:.2f}s: {:.1f} puzzles/sec, "
+                     "p50 {:.2f} ms, p99 {:.2f} ms\n".format(
+                         histogram.count, solved, elapsed, histogram.count / elapsed,
+                         1e3 * histogram.percentile(50), 1e3 * histogram.percentile(99)))
+
+
+if __name__ == "__main__":
+    main()
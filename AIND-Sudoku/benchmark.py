@@ -0,0 +1,206 @@
+"""Compare the speed of the Sudoku solver backends on a corpus of puzzles.
+
+The corpus is a text file with one 81-character grid per line, using '.' for
+empty boxes. The default corpus, puzzles/hard_diagonal.txt, holds diagonal
+puzzles with a unique solution that need the most guesses from the
+propagation engine. Every engine solves every puzzle, and the solutions are
+checked against each other. The NumPy engine, which only pays off on large
+batches, is measured separately for a range of batch sizes. The scaling
+benchmark solves generated diagonal puzzles from 4x4 up to 25x25. The rules
+benchmark solves the corpus with each advanced deduction rule of rules.py on
+its own and with all of them, reporting the time and eliminations per rule.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import timeit
+
+import engine
+import rules
+import solution
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles', 'hard_diagonal.txt')
+REPEAT = 3  # number of times each puzzle is solved per engine, keeping the fastest
+BATCH_SIZES = [1, 10, 100, 1000]  # batch sizes for the NumPy engine
+BOX_SIZES = [2, 3, 4, 5]  # box sizes of the scaling benchmark: 4x4 up to 25x25
+SCALING_PUZZLES = 10  # puzzles generated per box size
+CLUE_FRACTION = 0.5  # fraction of the boxes given in the generated puzzles
+
+
+def load_puzzles(path):
+    """Return the grids in a corpus file, skipping blank lines and comments. """
+    with open(path) as corpus:
+        return [line.strip() for line in corpus if line.strip() and not line.startswith('#')]
+
+
+def time_engine(puzzles, engine, repeat):
+    """Return the solutions of the puzzles and the best time to solve each one. """
+    solutions = []
+    times = []
+    for grid in puzzles:
+        best = float('inf')
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            values = solution.solve(grid, engine=engine)
+            best = min(best, timeit.default_timer() - start)
+        solutions.append(values)
+        times.append(best)
+    return solutions, times
+
+
+def benchmark_engines(puzzles, engines, repeat):
+    """Print the puzzles/sec and the mean and worst time per puzzle of each engine. """
+    print("\n{:^13}{:^9}{:^9}{:^13}{:^11}{:^11}".format(
+        "Engine", "Puzzles", "Solved", "Puzzles/sec", "Mean ms", "Max ms"))
+    reference = None
+    for engine in engines:
+        solutions, times = time_engine(puzzles, engine, repeat)
+        if reference is None:
+            reference = solutions
+        elif solutions != reference:
+            print("{} disagrees with {} on {} puzzles".format(
+                engine, engines[0], sum(a != b for a, b in zip(solutions, reference))))
+        print("{:^13}{:^9}{:^9}{:^13.1f}{:^11.2f}{:^11.2f}".format(
+            engine, len(puzzles), sum(1 for values in solutions if values),
+            len(times) / sum(times), 1e3 * sum(times) / len(times), 1e3 * max(times)))
+
+
+def benchmark_batch_sizes(puzzles, sizes):
+    """Print the puzzles/sec of the NumPy batch engine for each batch size,
+    next to the propagation engine solving the same puzzles one at a time.
+    Each size solves `max(sizes)` puzzles, cycling through the corpus.
+    """
+    if importlib.util.find_spec('numpy') is None:
+        print("\nSkipping the batch benchmark, which needs numpy")
+        return
+    total = max(sizes)
+    grids = [puzzles[k % len(puzzles)] for k in range(total)]
+    print("\n{:^12}{:^12}{:^13}".format("Batch size", "Puzzles", "Puzzles/sec"))
+    start = timeit.default_timer()
+    for grid in grids:
+        solution.solve(grid)
+    print("{:^12}{:^12}{:^13.1f}".format("scalar", total, total / (timeit.default_timer() - start)))
+    for size in sizes:
+        start = timeit.default_timer()
+        for k in range(0, total, size):
+            solution.solve_batch(grids[k:k + size])
+        print("{:^12}{:^12}{:^13.1f}".format(size, total, total / (timeit.default_timer() - start)))
+
+
+def random_puzzles(box_size, count, clue_fraction, seed=0):
+    """Generate puzzles of a box size by solving a grid with a random permutation
+    of the digits on its main diagonal, then keeping a random fraction of the boxes.
+    """
+    tables = engine.get_tables(box_size)
+    rng = random.Random(seed)
+    puzzles = []
+    for _ in range(count):
+        digits = list(tables.digits)
+        rng.shuffle(digits)
+        grid = ['.'] * len(tables.boxes)
+        for i, digit in enumerate(digits):
+            grid[i * tables.size + i] = digit
+        values = solution.solve(''.join(grid))
+        clues = set(rng.sample(range(len(tables.boxes)), int(clue_fraction * len(tables.boxes))))
+        puzzles.append(''.join(values[box] if i in clues else '.'
+                               for i, box in enumerate(tables.boxes)))
+    return puzzles
+
+
+def benchmark_scaling(box_sizes, count, clue_fraction):
+    """Print the time to build the tables of each grid size, and the mean time
+    per puzzle of every engine on generated puzzles of that size.
+    """
+    engines = list(solution.ENGINES)
+    if importlib.util.find_spec('numpy') is not None:
+        engines.append('numpy')
+    print("\n{:^8}{:^8}{:^11}".format("Grid", "Boxes", "Tables ms") +
+          ''.join('{:^15}'.format(name + ' ms') for name in engines))
+    for box_size in box_sizes:
+        start = timeit.default_timer()
+        engine.Tables(*engine.layout(box_size))
+        build_time = timeit.default_timer() - start
+        puzzles = random_puzzles(box_size, count, clue_fraction, seed=box_size)
+        times = []
+        for name in engines:
+            start = timeit.default_timer()
+            if name == 'numpy':
+                solution.solve_batch(puzzles)
+            else:
+                for grid in puzzles:
+                    solution.solve(grid, engine=name)
+            times.append((timeit.default_timer() - start) / count)
+        size = box_size * box_size
+        print("{:^8}{:^8}{:^11.1f}".format("{0}x{0}".format(size), size * size, 1e3 * build_time) +
+              ''.join('{:^15.2f}'.format(1e3 * elapsed) for elapsed in times))
+
+
+def benchmark_uniqueness(puzzles, limit):
+    """Print how many puzzles have one, several or no solutions, and the time
+    the Dancing Links solver takes to count them.
+    """
+    start = timeit.default_timer()
+    counts = [solution.count_solutions(grid, limit) for grid in puzzles]
+    elapsed = timeit.default_timer() - start
+    print("\nUnique: {}  Multiple: {}  None: {}  ({:.2f} ms per count, limit {})".format(
+        counts.count(1), sum(1 for count in counts if count > 1), counts.count(0),
+        1e3 * elapsed / len(puzzles), limit))
+
+
+def benchmark_rules(puzzles, configurations):
+    """Print the time and number of guesses to solve the puzzles with each list
+    of extra rule names, and the time and eliminations of each rule.
+    """
+    print("\n{:^18}{:^10}{:^9}  {}".format("Rules", "Total ms", "Guesses", "Rule ms/eliminations"))
+    for names in configurations:
+        solver = engine.Solver(solution.TABLES, rules=names, timing=True)
+        times = dict.fromkeys(solver.rule_names, 0.)
+        counts = dict.fromkeys(solver.rule_names, 0)
+        guesses = 0
+        start = timeit.default_timer()
+        for grid in puzzles:
+            solver.solve(solution.TABLES.parse(grid))
+            guesses += solver.guesses
+            for name in solver.rule_names:
+                times[name] += solver.times[name]
+                counts[name] += solver.counts[name]
+        elapsed = timeit.default_timer() - start
+        label = 'all' if names == rules.RULE_NAMES else ' '.join(names) or 'none'
+        print("{:^18}{:^10.0f}{:^9}  {}".format(
+            label, 1e3 * elapsed, guesses,
+            ', '.join('{} {:.0f}/{}'.format(name, 1e3 * times[name], counts[name])
+                      for name in solver.rule_names)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solver backends.")
+    parser.add_argument('corpus', nargs='?', default=CORPUS,
+                        help="File with one 81-character puzzle per line.")
+    parser.add_argument('-e', '--engines', nargs='+', choices=solution.ENGINES,
+                        default=list(solution.ENGINES), help="Engines to benchmark.")
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT,
+                        help="Times each puzzle is solved, keeping the fastest.")
+    parser.add_argument('-l', '--limit', type=int, default=2,
+                        help="Early-stop limit of the solution count.")
+    parser.add_argument('-b', '--batch-sizes', nargs='*', type=int, default=BATCH_SIZES,
+                        help="Batch sizes for the NumPy engine (none to skip).")
+    parser.add_argument('-s', '--box-sizes', nargs='*', type=int, default=BOX_SIZES,
+                        help="Box sizes of the scaling benchmark, e.g. 4 for 16x16 (none to skip).")
+    parser.add_argument('--rules', action='store_true',
+                        help="Also benchmark the advanced deduction rules.")
+    args = parser.parse_args()
+
+    puzzles = load_puzzles(args.corpus)
+    benchmark_engines(puzzles, args.engines, args.repeat)
+    benchmark_uniqueness(puzzles, args.limit)
+    if args.batch_sizes:
+        benchmark_batch_sizes(puzzles, args.batch_sizes)
+    if args.box_sizes:
+        benchmark_scaling(args.box_sizes, SCALING_PUZZLES, CLUE_FRACTION)
+    if args.rules:
+        benchmark_rules(puzzles, [[]] + [[name] for name in rules.RULE_NAMES] + [rules.RULE_NAMES])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Solution cache keyed on a canonical form of the puzzle, so that a puzzle that
+is the same as an earlier one up to a symmetry of the grid and a relabeling
+of the digits is answered without solving it again.
+
+The symmetries are the permutations of the boxes that map every unit onto a
+unit: the rotations and reflections of the square, and the row permutations
+that keep the bands and commute with flipping the grid upside down, applied
+to the columns as well. These keep both diagonals, so they hold for diagonal
+and standard puzzles alike (96 of them for 9x9). For grids larger than 9x9
+only the rotations and reflections are used, as the row permutations give
+18432 symmetries for 16x16, too many to try on every lookup.
+
+The canonical form of a puzzle is the smallest grid string obtained by
+applying a symmetry and then renaming the digits in their order of first
+appearance. The cache stores the solution of the canonical puzzle, and a hit
+maps it back through the inverse of the symmetry and the renaming.
+
+Canonical forms only mean something for one layout, so the symmetries and
+on-disk stores are tied to a fingerprint of the digits and units of the
+tables, and a store written for another layout is refused.
+"""
+import collections
+import dbm
+import hashlib
+import operator
+
+import engine
+
+# Symmetries of each table layout, by layout fingerprint, built on first use
+_SYMMETRIES = {}
+
+# Key of the layout fingerprint in an on-disk store
+_LAYOUT_KEY = b'__layout__'
+
+
+def layout_fingerprint(tables):
+    """Return a string that identifies the digits and units of a layout. """
+    units = sorted(tuple(sorted(unit)) for unit in tables.units)
+    return hashlib.sha1(repr((tables.digits, len(tables.boxes), units)).encode()).hexdigest()
+
+
+def _closure(generators, identity):
+    """Return every permutation obtained by composing the generators. """
+    group = set([identity])
+    frontier = [identity]
+    while frontier:
+        found = []
+        for permutation in frontier:
+            for generator in generators:
+                composed = tuple(permutation[i] for i in generator)
+                if composed not in group:
+                    group.add(composed)
+                    found.append(composed)
+        frontier = found
+    return sorted(group)
+
+
+def symmetries(tables):
+    """Return the symmetries of a layout as tuples of box indices: the puzzle
+    `grid` becomes `[grid[i] for i in symmetry]`.
+    """
+    fingerprint = layout_fingerprint(tables)
+    if fingerprint in _SYMMETRIES:
+        return _SYMMETRIES[fingerprint]
+    size = tables.size
+    box_size = int(round(size ** .5))
+
+    def boxes(row_of, col_of):
+        return tuple(row_of(r, c) * size + col_of(r, c) for r in range(size) for c in range(size))
+
+    generators = [boxes(lambda r, c: c, lambda r, c: r),
+                  boxes(lambda r, c: size - 1 - c, lambda r, c: r)]
+    if size <= 9:
+        rows = []
+        # swap two rows, and their mirror images
+        for a in range(size):
+            for b in range(a + 1, size):
+                order = list(range(size))
+                order[a], order[b] = order[b], order[a]
+                order[size - 1 - a], order[size - 1 - b] = order[size - 1 - b], order[size - 1 - a]
+                rows.append(order)
+        # swap two bands, and their mirror images
+        for a in range(box_size):
+            for b in range(a + 1, box_size):
+                order = list(range(size))
+                for band, other in ((a, b), (box_size - 1 - a, box_size - 1 - b)):
+                    for j in range(box_size):
+                        order[band * box_size + j] = other * box_size + j
+                        order[other * box_size + j] = band * box_size + j
+                rows.append(order)
+        generators.extend(boxes(lambda r, c: order[r], lambda r, c: order[c]) for order in rows)
+
+    # the units of both layouts, so that standard puzzles get the same symmetries
+    units = set(frozenset(unit) for unit in tables.units + engine.get_tables(box_size).units)
+
+    def keeps_units(permutation):
+        if sorted(permutation) != list(range(len(permutation))):
+            return False
+        position = dict((box, k) for k, box in enumerate(permutation))
+        return all(frozenset(position[i] for i in unit) in units for unit in units)
+
+    generators = [generator for generator in generators if keeps_units(generator)]
+    _SYMMETRIES[fingerprint] = _closure(generators, tuple(range(len(tables.boxes))))
+    return _SYMMETRIES[fingerprint]
+
+
+def canonical_form(tables, grid):
+    """Return the canonical form of a grid string, with the symmetry and the
+    renaming of the digits that produce it, so that
+    `canonical[k] == renaming[grid[symmetry[k]]]`.
+    """
+    digits = tables.digits
+    best = None
+    for symmetry in symmetries(tables):
+        moved = ''.join(operator.itemgetter(*symmetry)(grid))
+        order = ''.join(dict.fromkeys(moved.replace('.', '')))
+        renamed = moved.translate(str.maketrans(order, digits[:len(order)]))
+        if best is None or renamed < best[0]:
+            best = (renamed, symmetry, order)
+    canonical, symmetry, order = best
+    # digits missing from the puzzle are interchangeable, any renaming will do
+    order += ''.join(digit for digit in digits if digit not in order)
+    return canonical, symmetry, dict(zip(order, digits))
+
+
+class SolutionCache(object):
+    """LRU cache of solutions keyed on the canonical form of the puzzles.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+        capacity(int): the number of solutions kept in memory
+        path(string): optional; a dbm file that keeps every solution across runs.
+            It must have been written for the same layout, or ValueError is
+            raised.
+    """
+
+    def __init__(self, tables, capacity=1024, path=None):
+        self.tables = tables
+        self.capacity = capacity
+        self.hits = self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._store = None
+        if path is not None:
+            store = dbm.open(path, 'c')
+            fingerprint = layout_fingerprint(tables).encode()
+            if _LAYOUT_KEY in store:
+                found = store[_LAYOUT_KEY]
+            else:
+                found = None if len(store.keys()) else fingerprint
+                store[_LAYOUT_KEY] = fingerprint
+            if found != fingerprint:
+                store.close()
+                raise ValueError('The solution store {} was written for another layout'.format(path))
+            self._store = store
+
+    def _lookup(self, canonical):
+        if canonical in self._entries:
+            self._entries.move_to_end(canonical)
+            return self._entries[canonical]
+        if self._store is not None and canonical.encode() in self._store:
+            solved = self._store[canonical.encode()].decode()
+            self._remember(canonical, solved)
+            return solved
+        return None
+
+    def _remember(self, canonical, solved):
+        self._entries[canonical] = solved
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def solve(self, cells, solve):
+        """Return the solution of a puzzle from the cache, or from `solve`.
+        Args:
+            cells(list): the puzzle as a list of masks, with a single candidate
+                for the givens and every candidate for the other boxes
+            solve(function): solves a list of masks, returning the solved list
+                or False
+        Returns:
+            A solved list of masks, or False if the puzzle has no solution.
+        """
+        tables = self.tables
+        canonical, symmetry, renaming = canonical_form(tables, tables.to_grid(cells))
+        solved = self._lookup(canonical)
+        if solved is None:
+            self.misses += 1
+            # solve the puzzle as given, so that a recorder or hooks of `solve`
+            # see the caller's grid, and only store the canonical solution
+            result = solve(cells)
+            solved = ''
+            if result:
+                grid = tables.to_grid(result)
+                solved = ''.join(renaming[grid[i]] for i in symmetry)
+            self._remember(canonical, solved)
+            if self._store is not None:
+                self._store[canonical.encode()] = solved.encode()
+            return result
+        self.hits += 1
+        if not solved:
+            return False
+        original = dict((new, old) for old, new in renaming.items())
+        result = [0] * len(cells)
+        for k, digit in enumerate(solved):
+            result[symmetry[k]] = tables.digit_mask[original[digit]]
+        return result
+
+    def close(self):
+        """Close the on-disk store, if any. """
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,204 @@
+"""
+Exact cover backend for the Sudoku solver, using Knuth's Algorithm X with
+Dancing Links.
+
+Every (box, digit) placement is a row of the exact cover matrix, and there is
+a column for every box (it holds exactly one digit) and for every unit and
+digit (the digit appears exactly once in the unit). The columns come from the
+units of an `engine.Tables`, so the diagonal units of solution.py simply add
+more columns. The links are kept in flat integer lists instead of node
+objects: node 0 is the root, nodes 1 to the number of columns are the column
+headers, and the nodes of the rows follow.
+"""
+
+
+class DancingLinks(object):
+    """Exact cover solver for the puzzle layout described by `tables`.
+
+    The matrix is built once and restored after every call, so one instance
+    can solve any number of puzzles, but not from several threads at once.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+
+    Attributes:
+        nodes(int): the number of search nodes of the last solve or count
+        backtracks(int): the number of rows tried by the last solve or count
+            that led to no solution
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.nodes = self.backtracks = 0
+        num_digits = len(tables.digits)
+        num_boxes = len(tables.boxes)
+        num_columns = num_boxes + len(tables.units) * num_digits
+
+        # headers: the root and one node per column, linked left and right
+        self.L = [num_columns] + list(range(num_columns))
+        self.R = list(range(1, num_columns + 1)) + [0]
+        self.U = list(range(num_columns + 1))
+        self.D = list(range(num_columns + 1))
+        self.C = list(range(num_columns + 1))
+        self.size = [0] * (num_columns + 1)
+        # placement (box, bit) of the row of every node, and the first node of every row
+        self.row = [None] * (num_columns + 1)
+        self.row_start = []
+
+        for i in range(num_boxes):
+            for d in range(num_digits):
+                columns = [1 + i] + [1 + num_boxes + u * num_digits + d
+                                     for u in tables.cell_units[i]]
+                self._add_row((i, 1 << d), columns)
+
+    def _add_row(self, placement, columns):
+        L, R, U, D, C = self.L, self.R, self.U, self.D, self.C
+        first = len(L)
+        self.row_start.append(first)
+        for k, column in enumerate(columns):
+            node = first + k
+            L.append(first + (k - 1) % len(columns))
+            R.append(first + (k + 1) % len(columns))
+            U.append(U[column])
+            D.append(column)
+            C.append(column)
+            D[U[column]] = node
+            U[column] = node
+            self.size[column] += 1
+            self.row.append(placement)
+
+    def _cover(self, c):
+        L, R, U, D, C, size = self.L, self.R, self.U, self.D, self.C, self.size
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                size[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, size = self.L, self.R, self.U, self.D, self.C, self.size
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                size[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _select(self, node):
+        """Add the row of `node` to the partial solution by covering its other columns. """
+        j = self.R[node]
+        while j != node:
+            self._cover(self.C[j])
+            j = self.R[j]
+
+    def _unselect(self, node):
+        j = self.L[node]
+        while j != node:
+            self._uncover(self.C[j])
+            j = self.L[j]
+
+    def _search(self, partial, solutions, limit):
+        """Count the exact covers that extend `partial`, stopping at `limit`.
+        The first cover found is appended to `solutions`.
+        """
+        R, D, size = self.R, self.D, self.size
+        self.nodes += 1
+        if R[0] == 0:
+            if not solutions:
+                solutions.append(list(partial))
+            return 1
+        # choose the column with the fewest rows left
+        c = R[0]
+        j = R[c]
+        while j != 0:
+            if size[j] < size[c]:
+                c = j
+            j = R[j]
+        if not size[c]:
+            return 0
+
+        count = 0
+        self._cover(c)
+        r = D[c]
+        while r != c and count < limit:
+            partial.append(self.row[r])
+            self._select(r)
+            found = self._search(partial, solutions, limit - count)
+            if not found:
+                self.backtracks += 1
+            count += found
+            self._unselect(r)
+            partial.pop()
+            r = D[r]
+        self._uncover(c)
+        return count
+
+    def _row_columns(self, first):
+        columns = [self.C[first]]
+        node = self.R[first]
+        while node != first:
+            columns.append(self.C[node])
+            node = self.R[node]
+        return columns
+
+    def _run(self, cells, limit):
+        """Fix the solved boxes of `cells`, search, and restore the matrix.
+        Returns the number of solutions found (up to `limit`) and the first one.
+        """
+        lowest_digit = self.tables.lowest_digit
+        popcount = self.tables.popcount
+        num_digits = len(self.tables.digits)
+        covered = [False] * len(self.size)
+        self.nodes = self.backtracks = 0
+        given = []
+        count = 0
+        solutions = []
+        for i, mask in enumerate(cells):
+            if popcount[mask] > 1:
+                continue
+            if not mask:
+                break
+            columns = self._row_columns(self.row_start[i * num_digits + lowest_digit[mask]])
+            # a column that is already covered means two givens clash
+            if any(covered[c] for c in columns):
+                break
+            for c in columns:
+                covered[c] = True
+                self._cover(c)
+            given.append(columns)
+        else:
+            count = self._search([], solutions, limit)
+
+        for columns in reversed(given):
+            for c in reversed(columns):
+                self._uncover(c)
+        return count, (solutions[0] if solutions else None)
+
+    def solve(self, cells):
+        """Solve a puzzle given as a list of candidate masks, in which every box
+        with a single candidate is a given.
+        Returns:
+            A new solved list of masks, or False if the puzzle has no solution.
+        """
+        count, solution = self._run(cells, 1)
+        if not count:
+            return False
+        solved = list(cells)
+        for i, bit in solution:
+            solved[i] = bit
+        return solved
+
+    def count(self, cells, limit=2):
+        """Count the solutions of a puzzle, stopping once `limit` are found. """
+        return self._run(cells, limit)[0]
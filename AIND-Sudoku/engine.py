@@ -0,0 +1,540 @@
+"""
+Bitmask core of the Sudoku solver.
+
+The candidates of every box are stored as an int in which bit d is set while
+the digit `digits[d]` is still possible, and a puzzle is a flat list of these
+masks indexed by box. Units and peers are tuples of box indexes, and the
+popcount and digit strings of every mask are precomputed, so the constraint
+propagation in `Solver` runs on integer operations instead of the string
+edits of the dictionary representation used in solution.py.
+
+`get_tables` builds the tables of an N^2 x N^2 diagonal Sudoku for any box
+size N and caches them, so the solvers run unchanged on 16x16 and 25x25
+grids. For up to 16 symbols the per-mask tables are lists indexed by mask;
+above that a full table would need 2^25 entries, so they become
+dictionaries that compute each entry the first time it is looked up.
+"""
+import collections
+import string
+import timeit
+
+import rules
+
+# Symbols of the digits, in order; a grid with N^2 digits uses the first N^2
+SYMBOLS = '123456789' + string.ascii_uppercase
+# Largest number of digits for which the per-mask tables are precomputed lists
+TABLE_DIGITS = 16
+
+
+class _LazyTable(dict):
+    """Dictionary that computes and stores a missing entry with `function`. """
+
+    def __init__(self, function):
+        dict.__init__(self)
+        self.function = function
+
+    def __missing__(self, key):
+        value = self[key] = self.function(key)
+        return value
+
+
+class Tables(object):
+    """Integer lookup tables for a Sudoku layout.
+
+    Args:
+        boxes(list): the box names in index order, e.g. ['A1', 'A2', ...]
+        unitlist(list): every unit as a list of box names
+        digits(string): the symbols in bit order, e.g. '123456789'
+    """
+
+    def __init__(self, boxes, unitlist, digits):
+        self.boxes = list(boxes)
+        self.index = dict((box, i) for i, box in enumerate(self.boxes))
+        self.digits = digits
+        self.all_digits = (1 << len(digits)) - 1
+        self.digit_mask = dict((digit, 1 << d) for d, digit in enumerate(digits))
+
+        self.units = [tuple(self.index[box] for box in unit) for unit in unitlist]
+        self.cell_units = [tuple(u for u, unit in enumerate(self.units) if i in unit)
+                           for i in range(len(self.boxes))]
+        self.peers = [tuple(sorted(set(c for u in self.cell_units[i]
+                                       for c in self.units[u]) - set([i])))
+                      for i in range(len(self.boxes))]
+
+        def popcount(mask):
+            return bin(mask).count('1')
+
+        def lowest_digit(mask):
+            return (mask & -mask).bit_length() - 1
+
+        def mask_digits(mask):
+            return ''.join(digit for d, digit in enumerate(digits) if mask >> d & 1)
+
+        if len(digits) <= TABLE_DIGITS:
+            masks = range(self.all_digits + 1)
+            self.popcount = [popcount(mask) for mask in masks]
+            self.lowest_digit = [lowest_digit(mask) for mask in masks]
+            self.mask_digits = [mask_digits(mask) for mask in masks]
+        else:
+            self.popcount = _LazyTable(popcount)
+            self.lowest_digit = _LazyTable(lowest_digit)
+            self.mask_digits = _LazyTable(mask_digits)
+
+    @property
+    def size(self):
+        """The number of digits, and of boxes along each side of the grid. """
+        return len(self.digits)
+
+    def parse(self, grid):
+        """
+        Convert a grid string into a list of candidate masks.
+        Args:
+            grid(string) - A grid in string form, with '.' for empty boxes.
+        Returns:
+            A list with one candidate mask per box.
+        """
+        all_digits = self.all_digits
+        digit_mask = self.digit_mask
+        return [digit_mask[value] if value in digit_mask else all_digits
+                for value in grid]
+
+    def from_values(self, values):
+        """Convert a values dictionary like {'A1': '123', ...} into a list of
+        candidate masks.
+        """
+        digit_mask = self.digit_mask
+        return [sum(digit_mask[digit] for digit in values[box]) for box in self.boxes]
+
+    def to_grid(self, cells):
+        """Convert a list of candidate masks into a grid string, with '.' for
+        the boxes that have more than one candidate.
+        """
+        popcount = self.popcount
+        mask_digits = self.mask_digits
+        return ''.join(mask_digits[mask] if popcount[mask] == 1 else '.' for mask in cells)
+
+    def to_values(self, cells):
+        """Convert a list of candidate masks into a values dictionary. """
+        mask_digits = self.mask_digits
+        return dict(zip(self.boxes, (mask_digits[mask] for mask in cells)))
+
+
+def layout(box_size, diagonal=True):
+    """
+    Build the box names and units of an N^2 x N^2 Sudoku, named like solution.py.
+    Args:
+        box_size(int): N, the number of rows and columns of each square unit
+        diagonal(bool): whether the two main diagonals are units
+    Returns:
+        The list of box names in row-major order, the list of units and the digit symbols.
+    """
+    size = box_size * box_size
+    if size > len(SYMBOLS):
+        raise ValueError('Box size {} needs more than {} symbols'.format(box_size, len(SYMBOLS)))
+    rows = string.ascii_uppercase[:size]
+    cols = [str(c + 1) for c in range(size)]
+    boxes = [r + c for r in rows for c in cols]
+    row_units = [[r + c for c in cols] for r in rows]
+    col_units = [[r + c for r in rows] for c in cols]
+    square_units = [[rows[r] + cols[c]
+                     for r in range(br, br + box_size) for c in range(bc, bc + box_size)]
+                    for br in range(0, size, box_size) for bc in range(0, size, box_size)]
+    unitlist = row_units + col_units + square_units
+    if diagonal:
+        unitlist += [[rows[i] + cols[i] for i in range(size)],
+                     [rows[i] + cols[-i - 1] for i in range(size)]]
+    return boxes, unitlist, SYMBOLS[:size]
+
+
+_TABLES = {}
+
+
+def get_tables(box_size=3, diagonal=True):
+    """Return the Tables of an N^2 x N^2 Sudoku, building them only once per layout. """
+    key = (box_size, diagonal)
+    if key not in _TABLES:
+        _TABLES[key] = Tables(*layout(box_size, diagonal))
+    return _TABLES[key]
+
+
+def box_size_of(grid):
+    """Return the box size N of a grid string with N^4 characters. """
+    box_size = int(round(len(grid) ** 0.25))
+    if box_size ** 4 != len(grid):
+        raise ValueError('A grid has N^4 boxes, got {} characters'.format(len(grid)))
+    return box_size
+
+
+class Solver(object):
+    """Constraint propagation and depth-first search over candidate masks.
+
+    The rules mirror the dictionary based functions in solution.py and update
+    the list of masks in place. They return False as soon as a box runs out
+    of candidates.
+
+    `reduce_puzzle` is driven by a work queue: every change to a box pushes
+    the box onto the queue of solved boxes when it is down to one candidate,
+    and marks the units that contain it as dirty. Elimination then only
+    visits the peers of newly solved boxes, and the unit rules only revisit
+    dirty units, instead of rescanning the whole grid on every pass.
+
+    `search` backtracks on a trail: every change to a box is pushed onto an
+    undo log as `(box, old_mask)`, and a failed branch pops the log back to
+    where the branch started, so the search updates one list of masks in
+    place instead of copying it at every branch point.
+
+    Once the work queue is empty, the extra deduction rules of rules.py are
+    tried in the configured order. As soon as one of them changes a box, the
+    queue is processed again before any further rule runs.
+
+    Args:
+        tables(Tables): the lookup tables of the puzzle layout
+        recorder(recorder.Recorder): optional; receives every change to a box,
+            including the changes undone on backtracking
+        hooks(hooks.Hooks): optional; receives the propagation passes,
+            branches, backtracks and solutions of every solve
+        rules(list): names of the extra deduction rules in rules.py, or
+            `rules.Rule` instances, in the order they are tried
+        timing(bool): whether to also time the basic rules, which costs a few
+            percent; the extra rules are always timed
+        naked_twins(bool): whether propagation applies naked twins along with
+            eliminate and only choice
+
+    Attributes:
+        counts(dict): the number of boxes each rule has changed since the
+            last call to `solve`, keyed by rule name
+        times(dict): the seconds spent in each rule since the last call to
+            `solve`, keyed by rule name
+        guesses(int): the number of values tried by `search` since the last
+            call to `solve`
+        nodes(int): the number of search nodes, each choosing a box to branch
+            on, since the last call to `solve`
+        backtracks(int): the number of values tried by `search` that led to a
+            contradiction, since the last call to `solve`
+        passes(int): the number of rounds of propagation since the last call
+            to `solve`, each draining the solved boxes, processing one unit or
+            trying the extra rules
+    """
+
+    RULES = ('eliminate', 'only_choice', 'naked_twins')
+
+    def __init__(self, tables, recorder=None, rules=(), timing=False, hooks=None, naked_twins=True):
+        self.tables = tables
+        self.recorder = recorder
+        self.hooks = hooks
+        self.timing = timing
+        self.use_naked_twins = naked_twins
+        self.set_rules(rules)
+        self.guesses = self.nodes = self.backtracks = self.passes = 0
+        # undo log of (box, old_mask) pairs, reset by each public method
+        self._trail = []
+        # work queue of reduce_puzzle
+        self._solved = []
+        self._dirty = [False] * len(tables.units)
+        self._dirty_units = collections.deque()
+
+    def set_rules(self, names):
+        """Use the extra deduction rules called `names`, in that order. """
+        self.rules = rules.build_rules(self.tables, names)
+        self.rule_names = self.RULES + tuple(rule.name for rule in self.rules)
+        self.counts = dict.fromkeys(self.rule_names, 0)
+        self.times = dict.fromkeys(self.rule_names, 0.)
+
+    def reset_stats(self):
+        """Reset the rule counters and times and the search statistics, as
+        `solve` does before each puzzle.
+        """
+        for rule in self.rule_names:
+            self.counts[rule] = 0
+            self.times[rule] = 0.
+        self.guesses = self.nodes = self.backtracks = self.passes = 0
+
+    def _assign(self, cells, i, mask, rule):
+        self._trail.append((i, cells[i]))
+        if self.recorder is not None:
+            self.recorder.record(i, cells[i], mask)
+        cells[i] = mask
+        if rule is not None:
+            self.counts[rule] += 1
+        dirty = self._dirty
+        for u in self.tables.cell_units[i]:
+            if not dirty[u]:
+                dirty[u] = True
+                self._dirty_units.append(u)
+        if self.tables.popcount[mask] == 1:
+            self._solved.append(i)
+
+    def _undo(self, cells, mark):
+        """Roll the boxes back to the state they had when the trail was `mark` long. """
+        trail = self._trail
+        recorder = self.recorder
+        while len(trail) > mark:
+            i, mask = trail.pop()
+            if recorder is not None:
+                recorder.record(i, cells[i], mask)
+            cells[i] = mask
+
+    def _clear_queue(self):
+        for u in self._dirty_units:
+            self._dirty[u] = False
+        self._dirty_units.clear()
+        del self._solved[:]
+
+    def _only_choice_unit(self, cells, unit):
+        popcount = self.tables.popcount
+        # digits seen at least once, at least twice, and already placed
+        once = twice = placed = 0
+        for i in unit:
+            mask = cells[i]
+            twice |= once & mask
+            once |= mask
+            if popcount[mask] == 1:
+                placed |= mask
+        if once != self.tables.all_digits:
+            return False
+        singles = once & ~twice & ~placed
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+            for i in unit:
+                if cells[i] & bit:
+                    self._assign(cells, i, bit, 'only_choice')
+                    break
+        return True
+
+    def _naked_twins_unit(self, cells, unit):
+        popcount = self.tables.popcount
+        pairs = set()
+        twins = []
+        for i in unit:
+            mask = cells[i]
+            if popcount[mask] == 2:
+                if mask in pairs:
+                    twins.append(mask)
+                pairs.add(mask)
+        for twin in twins:
+            for i in unit:
+                mask = cells[i]
+                if popcount[mask] >= 2 and mask != twin and mask & twin:
+                    self._assign(cells, i, mask & ~twin, 'naked_twins')
+
+    def eliminate(self, cells):
+        """Remove the value of every solved box from the candidates of its peers. """
+        del self._trail[:]
+        popcount = self.tables.popcount
+        for unit in self.tables.units:
+            # digits placed in the unit; a digit placed twice is a contradiction
+            placed = 0
+            for i in unit:
+                mask = cells[i]
+                if popcount[mask] == 1:
+                    if placed & mask:
+                        return False
+                    placed |= mask
+            for i in unit:
+                mask = cells[i]
+                if mask & placed and popcount[mask] > 1:
+                    mask &= ~placed
+                    if not mask:
+                        return False
+                    self._assign(cells, i, mask, 'eliminate')
+        return True
+
+    def only_choice(self, cells):
+        """Assign every digit that fits in only one box of a unit to that box. """
+        del self._trail[:]
+        return all(self._only_choice_unit(cells, unit) for unit in self.tables.units)
+
+    def naked_twins(self, cells):
+        """Remove the digits of every pair of boxes in a unit that hold the same
+        two candidates from the other unsolved boxes of the unit.
+        """
+        del self._trail[:]
+        for unit in self.tables.units:
+            self._naked_twins_unit(cells, unit)
+        return True
+
+    def reduce_puzzle(self, cells):
+        """Apply the basic and extra rules until none of them can change a box. """
+        popcount = self.tables.popcount
+        del self._trail[:]
+        self._clear_queue()
+        self._solved.extend(i for i, mask in enumerate(cells) if popcount[mask] == 1)
+        self._dirty[:] = [True] * len(self.tables.units)
+        self._dirty_units.extend(range(len(self.tables.units)))
+        return self._propagate_pass(cells)
+
+    def _propagate_pass(self, cells):
+        """Run `_propagate`, timing it for the hooks if there are any. """
+        hooks = self.hooks
+        if hooks is None:
+            return self._propagate(cells)
+        start = timeit.default_timer()
+        consistent = self._propagate(cells)
+        hooks.propagation(timeit.default_timer() - start, consistent)
+        return consistent
+
+    def _propagate(self, cells):
+        """Process the work queue and the extra rules until none of them can change
+        a box, or return False on a contradiction.
+        """
+        peers = self.tables.peers
+        units = self.tables.units
+        solved = self._solved
+        dirty = self._dirty
+        dirty_units = self._dirty_units
+        timing = self.timing
+        use_naked_twins = self.use_naked_twins
+        hooks = self.hooks
+        times = self.times
+        clock = timeit.default_timer
+        while True:
+            self.passes += 1
+            if solved:
+                if timing:
+                    start = clock()
+                while solved:
+                    i = solved.pop()
+                    mask = cells[i]
+                    for peer in peers[i]:
+                        remaining = cells[peer]
+                        if remaining & mask:
+                            remaining &= ~mask
+                            if not remaining:
+                                if hooks is not None:
+                                    hooks.rule(self, 'eliminate', cells)
+                                return False
+                            self._assign(cells, peer, remaining, 'eliminate')
+                if timing:
+                    times['eliminate'] += clock() - start
+                if hooks is not None:
+                    hooks.rule(self, 'eliminate', cells)
+            if dirty_units:
+                u = dirty_units.popleft()
+                dirty[u] = False
+                if timing:
+                    start = clock()
+                consistent = self._only_choice_unit(cells, units[u])
+                if hooks is not None:
+                    hooks.rule(self, 'only_choice', cells)
+                if not consistent:
+                    return False
+                if timing:
+                    middle = clock()
+                    times['only_choice'] += middle - start
+                if use_naked_twins:
+                    self._naked_twins_unit(cells, units[u])
+                    if timing:
+                        times['naked_twins'] += clock() - middle
+                    if hooks is not None:
+                        hooks.rule(self, 'naked_twins', cells)
+                continue
+            for rule in self.rules:
+                start = clock()
+                consistent = rule(self, cells)
+                times[rule.name] += clock() - start
+                if hooks is not None:
+                    hooks.rule(self, rule.name, cells)
+                if consistent is False:
+                    return False
+                if solved or dirty_units:
+                    break
+            else:
+                return True
+
+    def _select_box(self, cells):
+        """Return the unsolved box with the fewest candidates, breaking ties by
+        the most unsolved peers, or None if every box is solved.
+        """
+        popcount = self.tables.popcount
+        peers = self.tables.peers
+        fewest = min([popcount[mask] for mask in cells if popcount[mask] > 1] or [0])
+        if not fewest:
+            return None
+        ties = [i for i, mask in enumerate(cells) if popcount[mask] == fewest]
+        if len(ties) == 1:
+            return ties[0]
+        return max(ties, key=lambda i: (sum(1 for p in peers[i] if popcount[cells[p]] > 1), -i))
+
+    def _order_values(self, cells, i):
+        """Return the candidate bits of a box, least constraining first: the
+        values that appear in the fewest candidates of its peers.
+        """
+        peer_masks = [cells[p] for p in self.tables.peers[i]]
+        bits = []
+        candidates = cells[i]
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            bits.append(bit)
+        return sorted(bits, key=lambda bit: sum(1 for mask in peer_masks if mask & bit))
+
+    def _search(self, cells):
+        i = self._select_box(cells)
+        if i is None:
+            return True
+        self.nodes += 1
+        hooks = self.hooks
+        for bit in self._order_values(cells, i):
+            mark = len(self._trail)
+            self.guesses += 1
+            if hooks is not None:
+                hooks.branch(i, bit)
+            self._clear_queue()
+            self._assign(cells, i, bit, None)
+            if self._propagate_pass(cells) and self._search(cells):
+                return True
+            self.backtracks += 1
+            if hooks is not None:
+                hooks.backtrack(i, bit)
+            self._undo(cells, mark)
+        return False
+
+    def branches(self, cells):
+        """Split a propagated puzzle on the box that `search` would branch on.
+        Returns:
+            None if every box is solved, else a new propagated list of masks for
+            every candidate of the box that does not lead to a contradiction,
+            in the order `search` would try them.
+        """
+        i = self._select_box(cells)
+        if i is None:
+            return None
+        children = []
+        for bit in self._order_values(cells, i):
+            child = list(cells)
+            self._clear_queue()
+            self._assign(child, i, bit, None)
+            if self._propagate(child):
+                children.append(child)
+            del self._trail[:]
+        return children
+
+    def search(self, cells):
+        """Solve the puzzle by constraint propagation and depth-first search,
+        updating the list of masks in place.
+        Returns:
+            The solved list of masks, or False if the puzzle has no solution.
+        """
+        if not self.reduce_puzzle(cells):
+            return False
+        del self._trail[:]
+        solved = self._search(cells)
+        del self._trail[:]
+        if solved and self.hooks is not None:
+            self.hooks.solution(cells)
+        return cells if solved else False
+
+    def solve(self, cells):
+        """Reset the rule counters and the recorder, and search for a solution
+        of the puzzle.
+        """
+        if self.recorder is not None:
+            self.recorder.begin(cells)
+        self.reset_stats()
+        if self.hooks is None:
+            return self.search(cells)
+        self.hooks.begin(cells)
+        solved = self.search(cells)
+        self.hooks.end(self, solved)
+        return solved
@@ -0,0 +1,224 @@
+"""
+Reproducible generation of Sudoku puzzles, diagonal or not, from easy to
+extremely hard.
+
+A puzzle starts from a random solved grid: a few random boxes get a random
+candidate, and the propagation engine solves the rest. Clues are then removed
+in a random order, putting back any clue whose removal would give the puzzle
+a second solution, until the puzzle is down to the number of clues of its
+tier. The 'extreme' tier removes every clue it can, leaving a minimal puzzle,
+and keeps the one of a few minimal puzzles that needs the most guesses.
+Everything is drawn from one `random.Random(seed)`, so the same seed always
+rebuilds the same corpus.
+
+Since the puzzle has a unique solution before a clue is removed, any second
+solution afterwards must put another digit in the emptied box. So instead of
+counting the solutions, the removal check searches for a solution with the
+clue's digit struck from the box, which stops at the first solution like a
+count with a limit of 2 but lets propagation start from a stronger position.
+
+Each puzzle is rated by the hardest deduction rule needed to solve it when
+the rules are tried from the simplest up, or 'extreme' when it still needs
+search. Run as a script, the generator spreads the work over a process pool:
+
+    python generator.py -n 5000 -o puzzles.txt --rated
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+import dlx
+import engine
+import rules
+
+# Tiers of the corpus and the number of clues their 9x9 puzzles keep; None
+# means a minimal puzzle, where every clue is needed for a unique solution
+TIERS = [('easy', 36), ('medium', 30), ('hard', 26), ('extreme', None)]
+EXTREME_CANDIDATES = 5  # minimal puzzles generated per 'extreme' puzzle
+# Ratings and the rules that need them, from the simplest; a puzzle that the
+# rules cannot finish is rated 'extreme'
+RATINGS = [('easy', ('eliminate', 'only_choice')),
+           ('medium', ('naked_twins',)),
+           ('hard', ('hidden_pairs', 'pointing_pairs', 'box_line')),
+           ('expert', ('hidden_triples', 'x_wing', 'swordfish')),
+           ('extreme', ())]
+CHUNK_SIZE = 20  # puzzles per task sent to a worker
+
+
+class Generator(object):
+    """Generates puzzles of one layout.
+
+    Args:
+        box_size(int): 3 for 9x9 puzzles
+        diagonal(bool): whether the two main diagonals are units
+    """
+
+    def __init__(self, box_size=3, diagonal=True):
+        self.tables = engine.get_tables(box_size, diagonal)
+        self.solver = engine.Solver(self.tables)
+        self.exact_cover = dlx.DancingLinks(self.tables)
+        # one solver per rating but the last, with the rules of that rating and the easier ones
+        self.raters = []
+        names = []
+        for rating, needs in RATINGS[:-1]:
+            names.extend(name for name in needs if name in rules.RULE_NAMES)
+            self.raters.append((rating, engine.Solver(self.tables, rules=list(names),
+                                                      naked_twins=len(self.raters) > 0)))
+
+    def solved_grid(self, rng):
+        """Return a random solved list of masks. """
+        tables = self.tables
+        while True:
+            cells = [tables.all_digits] * len(tables.boxes)
+            for i in rng.sample(range(len(cells)), tables.size):
+                if tables.popcount[cells[i]] > 1:
+                    cells[i] = tables.digit_mask[rng.choice(tables.mask_digits[cells[i]])]
+                    if not self.solver.reduce_puzzle(cells):
+                        break
+            else:
+                if self.solver.search(cells):
+                    return cells
+
+    def puzzle(self, rng, clues=None):
+        """Return a random puzzle with a unique solution as a list of masks,
+        keeping `clues` clues, or as few as possible if `clues` is None.
+        """
+        tables = self.tables
+        cells = self.solved_grid(rng)
+        order = list(range(len(cells)))
+        rng.shuffle(order)
+        given = len(cells)
+        for i in order:
+            if clues is not None and given <= clues:
+                break
+            clue = cells[i]
+            other = list(cells)
+            other[i] = tables.all_digits & ~clue
+            if not self.solver.search(other):
+                cells[i] = tables.all_digits
+                given -= 1
+        return cells
+
+    def is_unique(self, cells):
+        """Return whether a puzzle has exactly one solution. """
+        return self.exact_cover.count(cells, 2) == 1
+
+    def rate(self, cells):
+        """Return the rating of a puzzle in RATINGS: the easiest one whose rules
+        solve it without guessing.
+        """
+        popcount = self.tables.popcount
+        for rating, rater in self.raters:
+            rater.reset_stats()
+            reduced = list(cells)
+            if rater.reduce_puzzle(reduced) and all(popcount[mask] == 1 for mask in reduced):
+                return rating
+        return RATINGS[-1][0]
+
+    def hardest_puzzle(self, rng, candidates=EXTREME_CANDIDATES):
+        """Return the minimal puzzle that needs the most guesses from the
+        propagation engine, out of `candidates` of them.
+        """
+        hardest, most = None, -1
+        for _ in range(candidates):
+            cells = self.puzzle(rng)
+            self.solver.solve(list(cells))
+            if self.solver.guesses > most:
+                hardest, most = cells, self.solver.guesses
+        return hardest
+
+    def grid(self, cells):
+        """Return the grid string of a list of masks, with '.' for empty boxes. """
+        return self.tables.to_grid(cells)
+
+
+def generate_corpus(rng, count, layouts=(True, False), tiers=TIERS):
+    """Generate `count` puzzles of every tier for every layout.
+    Returns:
+        A list of {'grid': ..., 'tier': ..., 'diagonal': ...} dictionaries.
+    """
+    corpus = []
+    for diagonal in layouts:
+        generator = Generator(3, diagonal)
+        for tier, clues in tiers:
+            for _ in range(count):
+                if clues is None:
+                    cells = generator.hardest_puzzle(rng)
+                else:
+                    cells = generator.puzzle(rng, clues)
+                corpus.append({'grid': generator.grid(cells), 'tier': tier, 'diagonal': diagonal})
+    return corpus
+
+
+# Generators of the worker processes, by layout
+_GENERATORS = {}
+
+
+def generate_chunk(seed, chunk, size, diagonal=True, clues=None):
+    """Generate the puzzles of chunk number `chunk` of a seed, in a worker process.
+    Returns:
+        A list of `size` (grid, rating) pairs.
+    """
+    if diagonal not in _GENERATORS:
+        _GENERATORS[diagonal] = Generator(3, diagonal)
+    generator = _GENERATORS[diagonal]
+    rng = random.Random('{}:{}'.format(seed, chunk))
+    puzzles = []
+    for _ in range(size):
+        cells = generator.puzzle(rng, clues)
+        puzzles.append((generator.grid(cells), generator.rate(cells)))
+    return puzzles
+
+
+def generate_puzzles(count, seed=0, diagonal=True, clues=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Generate `count` unique puzzles on a process pool. The puzzles depend on
+    the seed and chunk size only, not on the number of workers.
+    Returns:
+        A list of (grid, rating) pairs.
+    """
+    workers = workers or os.cpu_count() or 1
+    sizes = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(generate_chunk, seed, chunk, size, diagonal, clues)
+                   for chunk, size in enumerate(sizes)]
+        return [puzzle for future in futures for puzzle in future.result()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles with a unique solution.")
+    parser.add_argument('-n', '--count', type=int, default=1000, help="Number of puzzles.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the puzzles.")
+    parser.add_argument('--standard', action='store_true',
+                        help="Generate standard puzzles instead of diagonal ones.")
+    parser.add_argument('--clues', type=int, default=None,
+                        help="Clues to keep (default: as few as possible).")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the puzzles to, or - for stdout (default).")
+    parser.add_argument('--rated', action='store_true',
+                        help="Follow every grid with its rating on the same line.")
+    args = parser.parse_args()
+
+    start = timeit.default_timer()
+    puzzles = generate_puzzles(args.count, args.seed, not args.standard, args.clues, args.workers)
+    elapsed = timeit.default_timer() - start
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for grid, rating in puzzles:
+            output.write('{} {}\n'.format(grid, rating) if args.rated else grid + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    ratings = [rating for _, rating in puzzles]
+    sys.stderr.write("{} puzzles in {:.2f}s: {:.0f} puzzles/min; {}\n".format(
+        len(puzzles), elapsed, 60 * len(puzzles) / elapsed,
+        ', '.join('{} {}'.format(name, ratings.count(name)) for name, _ in RATINGS)))
+
+
+if __name__ == "__main__":
+    main()
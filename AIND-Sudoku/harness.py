@@ -0,0 +1,171 @@
+"""Performance regression harness for the Sudoku engines.
+
+Builds a corpus with generator.py from a seed, so the same corpus can be
+rebuilt anywhere without downloading it, solves every puzzle with every
+engine, and writes the time, search nodes, backtracks and propagation passes
+of each solve to a JSON file. Two result files of the same seed hold the same
+puzzles in the same order, so a run can be compared with a baseline:
+
+    python harness.py --seed 0 -o baseline.json
+    python harness.py --seed 0 -o after.json --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+import dlx
+import engine
+import generator
+import sat
+
+ENGINES = ('propagation', 'dlx', 'sat')
+REPEAT = 3  # number of times each puzzle is solved per engine, keeping the fastest
+COUNT = 10  # puzzles per tier and layout
+
+
+def solve_stats(name, tables, cells):
+    """Solve a list of masks with an engine, leaving `cells` untouched.
+    Returns:
+        A dictionary with 'solved', and the 'nodes', 'backtracks' and 'passes'
+        of the engine, None for the counters it does not have. For the SAT
+        engine, the nodes are its decisions and the backtracks its conflicts.
+    """
+    if name == 'propagation':
+        solver = engine.Solver(tables)
+        solved = solver.solve(list(cells))
+        return {'solved': bool(solved), 'nodes': solver.nodes, 'backtracks': solver.backtracks,
+                'passes': solver.passes}
+    if name == 'dlx':
+        exact_cover = dlx.DancingLinks(tables)
+        solved = exact_cover.solve(cells)
+        return {'solved': bool(solved), 'nodes': exact_cover.nodes,
+                'backtracks': exact_cover.backtracks, 'passes': None}
+    if name == 'sat':
+        sudoku = sat.SatSudoku(tables)
+        solved = sudoku.solve(cells)
+        return {'solved': bool(solved), 'nodes': sudoku.solver.decisions,
+                'backtracks': sudoku.solver.conflicts, 'passes': None}
+    raise ValueError('Unknown engine {!r}, expected one of {}'.format(name, ENGINES))
+
+
+def time_solve(name, tables, cells, repeat):
+    """Return the best time in seconds of `repeat` solves of a list of masks.
+    The engines are built once, outside the timed region.
+    """
+    if name == 'propagation':
+        solve = engine.Solver(tables).solve
+    elif name == 'dlx':
+        solve = dlx.DancingLinks(tables).solve
+    else:
+        solve = sat.SatSudoku(tables).solve
+    best = float('inf')
+    for _ in range(repeat):
+        puzzle = list(cells)
+        start = timeit.default_timer()
+        solve(puzzle)
+        best = min(best, timeit.default_timer() - start)
+    return best
+
+
+def run(corpus, engines, repeat):
+    """Solve every puzzle of a corpus with every engine.
+    Returns:
+        A list of result dictionaries, one per puzzle and engine.
+    """
+    results = []
+    for index, puzzle in enumerate(corpus):
+        tables = engine.get_tables(3, puzzle['diagonal'])
+        cells = tables.parse(puzzle['grid'])
+        for name in engines:
+            result = {'puzzle': index, 'engine': name, 'tier': puzzle['tier'],
+                      'diagonal': puzzle['diagonal']}
+            result.update(solve_stats(name, tables, cells))
+            result['seconds'] = time_solve(name, tables, cells, repeat)
+            results.append(result)
+    return results
+
+
+def summarize(results):
+    """Group the results by engine, layout and tier.
+    Returns:
+        A dictionary mapping 'engine/diagonal/tier' (or 'engine/standard/tier')
+        to the count, total and worst seconds and mean counters of the group.
+    """
+    groups = {}
+    for result in results:
+        key = '{}/{}/{}'.format(result['engine'], 'diagonal' if result['diagonal'] else 'standard',
+                                result['tier'])
+        groups.setdefault(key, []).append(result)
+    summary = {}
+    for key, group in groups.items():
+        summary[key] = {'count': len(group),
+                        'solved': sum(1 for result in group if result['solved']),
+                        'total_seconds': sum(result['seconds'] for result in group),
+                        'max_seconds': max(result['seconds'] for result in group)}
+        for counter in ('nodes', 'backtracks', 'passes'):
+            values = [result[counter] for result in group if result[counter] is not None]
+            summary[key]['mean_' + counter] = float(sum(values)) / len(values) if values else None
+    return summary
+
+
+def compare(summary, baseline):
+    """Print the total time of every group next to a baseline summary, on
+    stderr so that it does not mix with JSON written to stdout.
+    """
+    print("{:^32}{:^13}{:^13}{:^9}".format("Group", "Baseline ms", "Current ms", "Ratio"),
+          file=sys.stderr)
+    for key in sorted(summary):
+        current = summary[key]['total_seconds']
+        if key not in baseline:
+            print("{:^32}{:^13}{:^13.2f}{:^9}".format(key, '-', 1e3 * current, '-'), file=sys.stderr)
+            continue
+        before = baseline[key]['total_seconds']
+        print("{:^32}{:^13.2f}{:^13.2f}{:^9.2f}".format(key, 1e3 * before, 1e3 * current,
+                                                         current / before), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Sudoku engines on a generated corpus.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the generated corpus.")
+    parser.add_argument('-n', '--count', type=int, default=COUNT,
+                        help="Puzzles per tier and layout.")
+    parser.add_argument('-e', '--engines', nargs='+', choices=ENGINES, default=list(ENGINES),
+                        help="Engines to run.")
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT,
+                        help="Times each puzzle is solved, keeping the fastest.")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the JSON results to, or - for stdout (default).")
+    parser.add_argument('--corpus-output', help="Also write the corpus, one grid per line.")
+    parser.add_argument('--compare', help="JSON results of a baseline run with the same seed.")
+    args = parser.parse_args()
+
+    corpus = generator.generate_corpus(random.Random(args.seed), args.count)
+    if args.corpus_output:
+        with open(args.corpus_output, 'w') as output:
+            output.write('# python harness.py --seed {} --count {}\n'.format(args.seed, args.count))
+            for puzzle in corpus:
+                output.write(puzzle['grid'] + '\n')
+
+    results = run(corpus, args.engines, args.repeat)
+    report = {'seed': args.seed, 'count': args.count, 'repeat': args.repeat,
+              'python': platform.python_version(), 'machine': platform.machine(),
+              'corpus': corpus, 'results': results, 'summary': summarize(results)}
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=1, sort_keys=True)
+    else:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            baseline = json.load(baseline)
+        if baseline['corpus'] != corpus:
+            sys.stderr.write("The baseline was run on a different corpus\n")
+        compare(report['summary'], baseline['summary'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Instrumentation hooks for `engine.Solver`.
+
+A solver with `hooks` set calls them at every step of a solve; a solver
+without hooks only pays for one `is None` test per branch, propagation pass
+and rule application, and nothing per change to a box. `Hooks.rule` follows
+every application of a rule, and the rule counters and times the solver
+keeps anyway (`Solver.counts` and `Solver.times`) show what it changed, so
+changes are not reported one by one.
+
+`Hooks` does nothing; subclass it and override the events of interest.
+`StatsCollector` aggregates the events into per-puzzle statistics:
+
+    collector = StatsCollector()
+    solution.solve(grid, hooks=collector)
+    collector.summary()
+"""
+import timeit
+
+
+class Hooks(object):
+    """The events of a solve, all doing nothing. """
+
+    def begin(self, cells):
+        """A solve starts from the list of masks `cells`. """
+
+    def propagation(self, seconds, consistent):
+        """A propagation pass took `seconds`, and found a contradiction unless
+        `consistent`.
+        """
+
+    def rule(self, solver, name, cells):
+        """The rule called `name` ran on the list of masks `cells`: eliminate
+        on the boxes solved since it last ran, only choice and naked twins on
+        one unit, or an extra rule on the whole grid. `solver.counts[name]`
+        holds the number of boxes it has changed so far.
+        """
+
+    def branch(self, box, bit):
+        """The search tries the candidate `bit` in box index `box`. """
+
+    def backtrack(self, box, bit):
+        """The candidate `bit` of box index `box` led to a contradiction. """
+
+    def solution(self, cells):
+        """The search found the solved list of masks `cells`. """
+
+    def end(self, solver, solved):
+        """The solve finished with the solved masks or False. The rule counters
+        and times of the solve are in `solver.counts` and `solver.times`.
+        """
+
+
+class StatsCollector(Hooks):
+    """Collects the statistics of every solve.
+
+    Attributes:
+        puzzles(list): one dictionary per solve, with the wall time in
+            'seconds', the part of it spent in propagation in
+            'propagation_seconds' and the rest in 'search_seconds', the
+            number of 'propagations', 'branches' and 'backtracks', whether
+            it was 'solved', and the changes made by each rule in 'rules'
+    """
+
+    def __init__(self):
+        self.puzzles = []
+        self._current = None
+        self._start = 0.
+
+    def begin(self, cells):
+        self._current = {'propagations': 0, 'propagation_seconds': 0., 'branches': 0,
+                         'backtracks': 0, 'solved': False}
+        self._start = timeit.default_timer()
+
+    def propagation(self, seconds, consistent):
+        self._current['propagations'] += 1
+        self._current['propagation_seconds'] += seconds
+
+    def branch(self, box, bit):
+        self._current['branches'] += 1
+
+    def backtrack(self, box, bit):
+        self._current['backtracks'] += 1
+
+    def solution(self, cells):
+        self._current['solved'] = True
+
+    def end(self, solver, solved):
+        stats = self._current
+        stats['seconds'] = timeit.default_timer() - self._start
+        stats['search_seconds'] = stats['seconds'] - stats['propagation_seconds']
+        stats['rules'] = dict(solver.counts)
+        self.puzzles.append(stats)
+        self._current = None
+
+    def summary(self):
+        """Return the totals over every solve, with the number of 'puzzles'. """
+        totals = {'puzzles': len(self.puzzles), 'rules': {}}
+        for stats in self.puzzles:
+            for key, value in stats.items():
+                if key == 'rules':
+                    for rule, count in value.items():
+                        totals['rules'][rule] = totals['rules'].get(rule, 0) + count
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
@@ -2,6 +2,16 @@ import pygame
 
 from pygame import *
 
+# Rounded rectangles already drawn, by size, color and radius
+_rounded = {}
+# The font of the squares, loaded once
+_font = []
+
+def reset_cache():
+    """Forget the cached font and rectangles, which belong to one pygame.init()."""
+    _rounded.clear()
+    del _font[:]
+
 def AAfilledRoundedRect(surface,rect,color,radius=0.4):
 
     """
@@ -14,6 +24,9 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
     """
 
     rect         = Rect(rect)
+    key          = (rect.size, tuple(color), radius)
+    if key in _rounded:
+        return surface.blit(_rounded[key],rect.topleft)
     color        = Color(*color)
     alpha        = color.a
     color.a      = 0
@@ -39,6 +52,7 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
     rectangle.fill(color,special_flags=BLEND_RGBA_MAX)
     rectangle.fill((255,255,255,alpha),special_flags=BLEND_RGBA_MIN)
 
+    _rounded[key] = rectangle
     return surface.blit(rectangle,pos)
 
 class SudokuSquare:
@@ -51,7 +65,9 @@ class SudokuSquare:
             number = ""
             self.color = (255, 255, 255)
         # print("FONTS", pygame.font.get_fonts())
-        self.font = pygame.font.SysFont('opensans', 21)
+        if not _font:
+            _font.append(pygame.font.SysFont('opensans', 21))
+        self.font = _font[0]
         self.text = self.font.render(number, 1, (255, 255, 255))
         self.textpos = self.text.get_rect()
         self.textpos = self.textpos.move(offsetX + 17, offsetY + 4)
@@ -0,0 +1,184 @@
+"""Parallel search for single very hard puzzles.
+
+The puzzle is propagated and then split breadth-first with
+`engine.Solver.branches`, always on the oldest subproblem, until the frontier
+holds at least K subproblems. The subproblems are searched concurrently in
+worker processes, and the first solution found wins: the pending tasks are
+cancelled, and the running ones see a shared stop event at their next search
+node and give up.
+
+The frontier keeps the order in which the sequential search would try the
+branches, so a puzzle whose solution is in the first branches is found by
+the first workers. Run as a script, it reports the speedup over the
+sequential search for a range of worker counts:
+
+    python parallel.py puzzles/hard_diagonal.txt --workers 1 2 4 8
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import timeit
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import engine
+
+FRONTIER_PER_WORKER = 4  # subproblems in the frontier per worker process
+
+
+class Cancelled(Exception):
+    """Raised inside a worker when another worker has found a solution. """
+
+
+class _CancellableSolver(engine.Solver):
+    """A Solver whose search gives up when a shared event is set. """
+
+    def __init__(self, tables, stop):
+        engine.Solver.__init__(self, tables)
+        self.stop = stop
+
+    def _search(self, cells):
+        if self.stop.is_set():
+            raise Cancelled()
+        return engine.Solver._search(self, cells)
+
+
+# Solver of the worker process, set up by _init_worker
+_WORKER = {}
+
+
+def _init_worker(box_size, diagonal, stop):
+    _WORKER['solver'] = _CancellableSolver(engine.get_tables(box_size, diagonal), stop)
+
+
+def _search_subproblem(cells):
+    """Search a subproblem in a worker process.
+    Returns:
+        The solved list of masks, False if the subproblem has no solution, or
+        None if the search was cancelled.
+    """
+    solver = _WORKER['solver']
+    try:
+        solved = solver.search(cells)
+    except Cancelled:
+        return None
+    if solved:
+        solver.stop.set()
+    return solved
+
+
+def frontier(solver, cells, size):
+    """Split a puzzle into at least `size` subproblems, unless it runs out of
+    boxes to branch on first.
+    Returns:
+        A solved list of masks if one turned up while splitting, or None, and
+        the list of subproblems, empty if the puzzle has no solution.
+    """
+    if not solver.reduce_puzzle(cells):
+        return None, []
+    subproblems = collections.deque([cells])
+    while subproblems and len(subproblems) < size:
+        children = solver.branches(subproblems[0])
+        if children is None:
+            return subproblems[0], []
+        subproblems.popleft()
+        subproblems.extend(children)
+    return None, list(subproblems)
+
+
+class ParallelSolver(object):
+    """Searches the subproblems of one puzzle at a time on a process pool.
+
+    Args:
+        box_size(int): 3 for 9x9 puzzles
+        diagonal(bool): whether the two main diagonals are units
+        workers(int): the number of worker processes (default: one per CPU)
+        frontier_size(int): the number of subproblems to split a puzzle into
+            (default: FRONTIER_PER_WORKER per worker)
+    """
+
+    def __init__(self, box_size=3, diagonal=True, workers=None, frontier_size=None):
+        self.tables = engine.get_tables(box_size, diagonal)
+        self.solver = engine.Solver(self.tables)
+        self.workers = workers or os.cpu_count() or 1
+        self.frontier_size = frontier_size or FRONTIER_PER_WORKER * self.workers
+        self._stop = multiprocessing.Event()
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                         initargs=(box_size, diagonal, self._stop))
+
+    def solve(self, cells):
+        """Solve a puzzle given as a list of masks.
+        Returns:
+            A solved list of masks, or False if the puzzle has no solution.
+        """
+        solved, subproblems = frontier(self.solver, list(cells), self.frontier_size)
+        if solved or not subproblems:
+            return solved or False
+        self._stop.clear()
+        pending = set(self._pool.submit(_search_subproblem, subproblem)
+                      for subproblem in subproblems)
+        solved = False
+        while pending and not solved:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                solved = solved or future.result()
+        self._stop.set()
+        for future in pending:
+            future.cancel()
+        # let the running tasks see the stop event before the next puzzle clears it
+        wait(pending)
+        return solved
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the parallel and sequential search.")
+    parser.add_argument('corpus', nargs='?', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'puzzles', 'hard_diagonal.txt'),
+                        help="File with one puzzle per line.")
+    parser.add_argument('-w', '--workers', nargs='+', type=int, default=[1, 2, 4],
+                        help="Worker counts to measure.")
+    parser.add_argument('-k', '--frontier', type=int, default=None,
+                        help="Subproblems per puzzle (default: {} per worker).".format(
+                            FRONTIER_PER_WORKER))
+    parser.add_argument('--standard', action='store_true', help="Puzzles without diagonal units.")
+    args = parser.parse_args()
+
+    with open(args.corpus) as corpus:
+        grids = [line.strip() for line in corpus if line.strip() and not line.startswith('#')]
+    box_size = engine.box_size_of(grids[0])
+    tables = engine.get_tables(box_size, not args.standard)
+    puzzles = [tables.parse(grid) for grid in grids]
+
+    solver = engine.Solver(tables)
+    sequential = []
+    for cells in puzzles:
+        start = timeit.default_timer()
+        solver.solve(list(cells))
+        sequential.append(timeit.default_timer() - start)
+    print("\n{:^9}{:^11}{:^11}{:^11}{:^13}".format("Workers", "Frontier", "Mean ms", "Max ms",
+                                                      "Speedup"))
+    print("{:^9}{:^11}{:^11.2f}{:^11.2f}{:^13}".format(
+        "sequential", '-', 1e3 * sum(sequential) / len(puzzles), 1e3 * max(sequential), '1.00'))
+    for workers in args.workers:
+        with ParallelSolver(box_size, not args.standard, workers, args.frontier) as parallel:
+            times = []
+            for cells in puzzles:
+                start = timeit.default_timer()
+                parallel.solve(cells)
+                times.append(timeit.default_timer() - start)
+        print("{:^9}{:^11}{:^11.2f}{:^11.2f}{:^13.2f}".format(
+            workers, parallel.frontier_size, 1e3 * sum(times) / len(puzzles), 1e3 * max(times),
+            sum(sequential) / sum(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compact recording of the changes the solver makes to a puzzle, for replaying
+a solve in the visualizer.
+
+Instead of a copy of the whole grid per assignment, a `Recorder` keeps the
+grid the solve started from and one `(box, old_mask, new_mask)` delta per
+change, including the changes undone when the search backtracks. The deltas
+go to a ring buffer that keeps the most recent ones, or to a file when the
+whole solve should be kept without holding it in memory. Recording is opt-in:
+a solver without a recorder only pays for one `is None` test per change.
+"""
+import collections
+import os
+import struct
+import tempfile
+
+# box index, old mask and new mask of one delta in a recording file
+DELTA = struct.Struct('<HII')
+
+
+class Recorder(object):
+    """Records the deltas of one solve at a time.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+        capacity(int): the number of most recent deltas kept in memory, or None
+            to keep them all
+        path(string): optional; write the deltas to this file instead of keeping
+            them in memory. '' uses a temporary file.
+    """
+
+    def __init__(self, tables, capacity=100000, path=None):
+        self.tables = tables
+        self.capacity = capacity
+        self.path = path
+        if path == '':
+            handle, self.path = tempfile.mkstemp(suffix='.deltas')
+            os.close(handle)
+        self.base = None
+        self.count = 0
+        self._buffer = collections.deque(maxlen=capacity)
+        self._file = None
+
+    def begin(self, cells):
+        """Start recording a new solve from the list of masks `cells`, dropping
+        the previous recording.
+        """
+        self.base = list(cells)
+        self.count = 0
+        self._buffer.clear()
+        if self.path is not None:
+            self.close()
+            self._file = open(self.path, 'wb')
+
+    def record(self, i, old, new):
+        """Record that the mask of box `i` changed from `old` to `new`. """
+        self.count += 1
+        if self._file is not None:
+            self._file.write(DELTA.pack(i, old, new))
+            return
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            # roll the base forward over the delta that is about to be dropped
+            j, _, mask = buffer[0]
+            self.base[j] = mask
+        buffer.append((i, old, new))
+
+    def close(self):
+        """Flush and close the recording file, if any. """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def deltas(self):
+        """Iterate over the recorded (box, old_mask, new_mask) deltas in order. """
+        if self.path is None:
+            for delta in list(self._buffer):
+                yield delta
+            return
+        if self._file is not None:
+            self._file.flush()
+        with open(self.path, 'rb') as recording:
+            while True:
+                data = recording.read(DELTA.size)
+                if len(data) < DELTA.size:
+                    return
+                yield DELTA.unpack(data)
+
+    def frames(self):
+        """Replay the recording, yielding a values dictionary like {'A1': '123', ...}
+        for the starting grid and after every delta that solves a box.
+        """
+        if self.base is None:
+            return
+        cells = list(self.base)
+        popcount = self.tables.popcount
+        yield self.tables.to_values(cells)
+        for i, _, new in self.deltas():
+            cells[i] = new
+            if popcount[new] == 1:
+                yield self.tables.to_values(cells)
@@ -0,0 +1,216 @@
+"""
+Deduction rules that `engine.Solver` can run when eliminate, only_choice and
+naked_twins have nothing left to do.
+
+Every rule is built for one `engine.Tables` from the name it is registered
+under in `RULES`, precomputing the index data it needs, and is then called
+with the solver and the list of masks. A rule changes boxes only through
+`Solver._assign`, so its changes are counted, recorded, undone on
+backtracking and fed back into the work queue of the basic rules. It returns
+False when it finds a contradiction.
+
+    hidden_pairs, hidden_triples: N digits confined to the same N boxes of a
+        unit leave those boxes no other candidates
+    pointing_pairs: a digit confined to the intersection of a square with
+        another unit is removed from the rest of that unit
+    box_line: a digit confined to the intersection of a row, column or
+        diagonal with a square is removed from the rest of the square
+    x_wing, swordfish: a digit confined to the same N columns in N rows is
+        removed from the rest of those columns, and the same with rows and
+        columns swapped
+"""
+import itertools
+
+
+def unit_kinds(tables):
+    """Return 'row', 'column', 'diagonal' or 'square' for every unit of the tables. """
+    size = tables.size
+    kinds = []
+    for unit in tables.units:
+        rows = set(i // size for i in unit)
+        cols = set(i % size for i in unit)
+        if len(rows) == 1:
+            kinds.append('row')
+        elif len(cols) == 1:
+            kinds.append('column')
+        elif len(rows) == size:
+            kinds.append('diagonal')
+        else:
+            kinds.append('square')
+    return kinds
+
+
+class Rule(object):
+    """Base class of the deduction rules. """
+    name = None
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __call__(self, solver, cells):
+        raise NotImplementedError
+
+
+def positions(cells, line, popcount):
+    """Map every digit bit that is not placed in a unit to the bitmask of the
+    positions in the unit where it can go.
+    """
+    placed = 0
+    where = {}
+    for k, i in enumerate(line):
+        mask = cells[i]
+        if popcount[mask] == 1:
+            placed |= mask
+            continue
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            where[bit] = where.get(bit, 0) | 1 << k
+    for bit in list(where):
+        if bit & placed:
+            del where[bit]
+    return where
+
+
+class HiddenSubset(Rule):
+    """Hidden pairs (size 2) and hidden triples (size 3). """
+
+    def __init__(self, tables, size):
+        Rule.__init__(self, tables)
+        self.size = size
+        self.name = 'hidden_pairs' if size == 2 else 'hidden_triples'
+        # a unit has one box per digit, so masks of positions count like candidate masks
+        self.position_count = tables.popcount
+
+    def __call__(self, solver, cells):
+        popcount = self.tables.popcount
+        position_count = self.position_count
+        size = self.size
+        for unit in self.tables.units:
+            # digits with 2 to size places; a single place is left to only_choice
+            few = [(bit, places) for bit, places in positions(cells, unit, popcount).items()
+                   if position_count[places] <= size]
+            if len(few) < size:
+                continue
+            for subset in itertools.combinations(few, size):
+                boxes = 0
+                for _, places in subset:
+                    boxes |= places
+                if position_count[boxes] < size:
+                    return False
+                if position_count[boxes] > size:
+                    continue
+                keep = sum(bit for bit, _ in subset)
+                for k, i in enumerate(unit):
+                    if boxes >> k & 1 and cells[i] & ~keep:
+                        solver._assign(cells, i, cells[i] & keep, self.name)
+        return True
+
+
+class LockedCandidates(Rule):
+    """Pointing pairs (from squares into lines) or box/line reduction (from
+    lines into squares), over every pair of units sharing two or more boxes.
+    """
+
+    def __init__(self, tables, pointing):
+        Rule.__init__(self, tables)
+        self.name = 'pointing_pairs' if pointing else 'box_line'
+        kinds = unit_kinds(tables)
+        self.intersections = []
+        for a, unit_a in enumerate(tables.units):
+            for b, unit_b in enumerate(tables.units):
+                if a == b or (kinds[a] == 'square') != pointing or (kinds[b] == 'square') == pointing:
+                    continue
+                shared = set(unit_a) & set(unit_b)
+                if len(shared) >= 2:
+                    self.intersections.append((tuple(shared),
+                                               tuple(i for i in unit_a if i not in shared),
+                                               tuple(i for i in unit_b if i not in shared)))
+
+    def __call__(self, solver, cells):
+        popcount = self.tables.popcount
+        for shared, only_a, only_b in self.intersections:
+            in_shared = 0
+            for i in shared:
+                in_shared |= cells[i]
+            in_a = 0
+            for i in only_a:
+                in_a |= cells[i]
+            locked = in_shared & ~in_a
+            if not locked:
+                continue
+            for i in only_b:
+                mask = cells[i]
+                if mask & locked and popcount[mask] > 1:
+                    mask &= ~locked
+                    if not mask:
+                        return False
+                    solver._assign(cells, i, mask, self.name)
+        return True
+
+
+class Fish(Rule):
+    """X-Wing (size 2) and Swordfish (size 3) on rows and columns. """
+
+    def __init__(self, tables, size):
+        Rule.__init__(self, tables)
+        self.size = size
+        self.name = 'x_wing' if size == 2 else 'swordfish'
+        kinds = unit_kinds(tables)
+        rows = [unit for unit, kind in zip(tables.units, kinds) if kind == 'row']
+        cols = [unit for unit, kind in zip(tables.units, kinds) if kind == 'column']
+        # (base lines, cover lines): position k of every base line lies in cover line k
+        self.orientations = [(rows, cols), (cols, rows)]
+        # a unit has one box per digit, so masks of positions count like candidate masks
+        self.position_count = tables.popcount
+
+    def __call__(self, solver, cells):
+        popcount = self.tables.popcount
+        position_count = self.position_count
+        size = self.size
+        for base, cover in self.orientations:
+            # for every digit, the base lines where it has 2 to size places
+            lines = {}
+            for line in base:
+                for bit, places in positions(cells, line, popcount).items():
+                    if position_count[places] <= size:
+                        lines.setdefault(bit, []).append((line, places))
+            for bit, candidates in lines.items():
+                for subset in itertools.combinations(candidates, size):
+                    covers = 0
+                    for _, places in subset:
+                        covers |= places
+                    if position_count[covers] != size:
+                        continue
+                    fish = set(i for line, _ in subset for i in line)
+                    for k, line in enumerate(cover):
+                        if not covers >> k & 1:
+                            continue
+                        for i in line:
+                            mask = cells[i]
+                            if mask & bit and i not in fish and popcount[mask] > 1:
+                                solver._assign(cells, i, mask & ~bit, self.name)
+        return True
+
+
+# Factories of the rules by name, in the default order
+RULES = [
+    ('hidden_pairs', lambda tables: HiddenSubset(tables, 2)),
+    ('pointing_pairs', lambda tables: LockedCandidates(tables, True)),
+    ('box_line', lambda tables: LockedCandidates(tables, False)),
+    ('hidden_triples', lambda tables: HiddenSubset(tables, 3)),
+    ('x_wing', lambda tables: Fish(tables, 2)),
+    ('swordfish', lambda tables: Fish(tables, 3)),
+]
+RULE_NAMES = [name for name, _ in RULES]
+
+
+def build_rules(tables, names):
+    """Build the rules called `names` for the tables, in the order given. A
+    `Rule` instance, such as the cage rule of a variant, is used as it is.
+    """
+    factories = dict(RULES)
+    for name in names:
+        if not isinstance(name, Rule) and name not in factories:
+            raise ValueError('Unknown rule {!r}, expected one of {}'.format(name, RULE_NAMES))
+    return [name if isinstance(name, Rule) else factories[name](tables) for name in names]
@@ -0,0 +1,237 @@
+"""
+SAT backend for the Sudoku solver: the puzzle is encoded as CNF over integer
+literals and solved by a DPLL solver with unit propagation on two watched
+literals.
+
+As in the DIMACS format, variable `v` is a positive integer and the literal
+`-v` is its negation. There is one variable per (box, digit) placement, and
+the clauses say that every box holds at least one and at most one digit, and
+that every digit appears at least once and at most once in every unit. The
+units come from an `engine.Tables`, so the diagonal units are encoded like
+any other. The clauses are built once per layout, and the givens of a puzzle
+are passed as assumptions, so one solver answers any number of puzzles.
+
+The solver is independent of the propagation and Dancing Links engines,
+which makes it a cross-check on hard instances rather than a fast path.
+"""
+
+
+class SatSolver(object):
+    """DPLL satisfiability solver with watched literals and chronological
+    backtracking. Decisions branch on the shortest unsatisfied clause of
+    positive literals, which for Sudoku is the box or unit with the fewest
+    candidates left.
+
+    Args:
+        num_vars(int): the number of variables, numbered from 1
+        clauses(list): the clauses, as lists of non-zero integer literals
+
+    Attributes:
+        decisions(int): the number of decisions of the last solve
+        conflicts(int): the number of conflicts of the last solve
+    """
+
+    def __init__(self, num_vars, clauses):
+        self.num_vars = num_vars
+        self.decisions = self.conflicts = 0
+        # value of every literal, indexed by literal + num_vars: 1 true, -1 false, 0 unassigned
+        self.value = [0] * (2 * num_vars + 1)
+        # clauses watching each literal, indexed like `value`
+        self.watches = [[] for _ in range(2 * num_vars + 1)]
+        self.clauses = []
+        self.units = []
+        for clause in clauses:
+            clause = list(clause)
+            if len(clause) == 1:
+                self.units.append(clause[0])
+                continue
+            self.watches[clause[0] + num_vars].append(len(self.clauses))
+            self.watches[clause[1] + num_vars].append(len(self.clauses))
+            self.clauses.append(clause)
+        self.positive = [clause for clause in self.clauses if all(literal > 0 for literal in clause)]
+        self._trail = []
+
+    def _assign(self, literal):
+        offset = self.num_vars
+        self.value[literal + offset] = 1
+        self.value[offset - literal] = -1
+        self._trail.append(literal)
+
+    def _undo(self, mark):
+        offset = self.num_vars
+        value = self.value
+        trail = self._trail
+        while len(trail) > mark:
+            literal = trail.pop()
+            value[literal + offset] = value[offset - literal] = 0
+
+    def _propagate(self, start):
+        """Propagate the literals of the trail from `start` on. Returns False on a conflict. """
+        offset = self.num_vars
+        value = self.value
+        watches = self.watches
+        clauses = self.clauses
+        trail = self._trail
+        head = start
+        while head < len(trail):
+            false = -trail[head]
+            head += 1
+            watching = watches[false + offset]
+            kept = []
+            for position, c in enumerate(watching):
+                clause = clauses[c]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                other = clause[0]
+                if value[other + offset] == 1:
+                    kept.append(c)
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if value[literal + offset] != -1:
+                        clause[1], clause[k] = literal, false
+                        watches[literal + offset].append(c)
+                        break
+                else:
+                    kept.append(c)
+                    if value[other + offset] == -1:
+                        kept.extend(watching[position + 1:])
+                        watches[false + offset] = kept
+                        return False
+                    self._assign(other)
+            watches[false + offset] = kept
+        return True
+
+    def _decide(self):
+        """Return the first unassigned literal of the shortest unsatisfied
+        positive clause, or None if every positive clause is satisfied.
+        """
+        offset = self.num_vars
+        value = self.value
+        best, fewest = None, None
+        for clause in self.positive:
+            free = []
+            for literal in clause:
+                state = value[literal + offset]
+                if state == 1:
+                    break
+                if not state:
+                    free.append(literal)
+            else:
+                if fewest is None or len(free) < fewest:
+                    best, fewest = free[0], len(free)
+                    if fewest <= 1:
+                        break
+        return best
+
+    def _unassigned(self):
+        offset = self.num_vars
+        for var in range(1, self.num_vars + 1):
+            if not self.value[var + offset]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """Look for a model in which all the assumption literals are true.
+        Returns:
+            The set of true variables of a model, or None if there is none.
+        """
+        self.decisions = self.conflicts = 0
+        self._undo(0)
+        for literal in list(self.units) + list(assumptions):
+            state = self.value[literal + self.num_vars]
+            if state == -1:
+                return None
+            if not state:
+                self._assign(literal)
+        # (trail length before the decision, decision literal, whether it was flipped)
+        decisions = []
+        consistent = self._propagate(0)
+        while True:
+            if not consistent:
+                self.conflicts += 1
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    self._undo(0)
+                    return None
+                mark, literal, _ = decisions.pop()
+                self._undo(mark)
+                decisions.append((mark, -literal, True))
+                self._assign(-literal)
+                consistent = self._propagate(mark)
+                continue
+            literal = self._decide()
+            if literal is None:
+                literal = self._unassigned()
+                if literal is None:
+                    model = set(literal for literal in self._trail if literal > 0)
+                    self._undo(0)
+                    return model
+            self.decisions += 1
+            mark = len(self._trail)
+            decisions.append((mark, literal, False))
+            self._assign(literal)
+            consistent = self._propagate(mark)
+
+
+def sudoku_cnf(tables):
+    """Encode the rules of a layout as CNF.
+    Returns:
+        The number of variables and the list of clauses; the variable of
+        digit d in box i is `i * len(tables.digits) + d + 1`.
+    """
+    num_digits = len(tables.digits)
+
+    def var(i, d):
+        return i * num_digits + d + 1
+
+    def exactly_one(literals):
+        clauses = [literals]
+        for a in range(len(literals)):
+            for b in range(a + 1, len(literals)):
+                clauses.append([-literals[a], -literals[b]])
+        return clauses
+
+    clauses = []
+    for i in range(len(tables.boxes)):
+        clauses.extend(exactly_one([var(i, d) for d in range(num_digits)]))
+    for unit in tables.units:
+        for d in range(num_digits):
+            clauses.extend(exactly_one([var(i, d) for i in unit]))
+    return len(tables.boxes) * num_digits, clauses
+
+
+class SatSudoku(object):
+    """Solves puzzles of one layout with SatSolver.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.solver = SatSolver(*sudoku_cnf(tables))
+
+    def solve(self, cells):
+        """Solve a puzzle given as a list of candidate masks, in which every box
+        with a single candidate is a given and every other box is empty.
+        Returns:
+            A new solved list of masks, or False if the puzzle has no solution.
+        """
+        tables = self.tables
+        num_digits = len(tables.digits)
+        assumptions = []
+        for i, mask in enumerate(cells):
+            if not mask:
+                return False
+            if tables.popcount[mask] == 1:
+                assumptions.append(i * num_digits + tables.lowest_digit[mask] + 1)
+        model = self.solver.solve(assumptions)
+        if model is None:
+            return False
+        solved = [0] * len(cells)
+        for var in model:
+            i, d = divmod(var - 1, num_digits)
+            solved[i] = 1 << d
+        return solved
@@ -1,5 +1,11 @@
-import itertools
-assignments = []
+import dlx
+import engine
+import sat
+from recorder import Recorder
+
+# Optional recorder.Recorder of the changes assign_value makes, for visualize_assignments. It starts
+# recording from the values of its first change unless begin() was called; None records nothing.
+assignment_recorder = None
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
@@ -29,11 +35,61 @@ def assign_value(values, box, value):
     if values[box] == value:
         return values
 
+    if assignment_recorder is not None:
+        if assignment_recorder.base is None:
+            assignment_recorder.begin(TABLES.from_values(values))
+        assignment_recorder.record(TABLES.index[box], _digits_mask(values[box]), _digits_mask(value))
     values[box] = value
-    if len(value) == 1:
-        assignments.append(values.copy())
     return values
 
+def _digits_mask(value):
+    "Candidate mask of a string of digits."
+    return sum(TABLES.digit_mask[digit] for digit in value)
+
+# Bitmask engine shared by the functions below, see engine.py
+TABLES = engine.get_tables(3) # the same boxes and units as above
+SOLVER = engine.Solver(TABLES)
+_RULES = engine.Solver(TABLES)
+DLX = dlx.DancingLinks(TABLES)
+
+# Solvers of the other box sizes, and the vectorized.BatchSolver of each box size, which needs
+# numpy; all created on first use
+_SIZED_SOLVERS = {}
+_BATCH_SOLVERS = {}
+
+def _solvers(grid):
+    """
+    Return the tables, the propagation solver and the Dancing Links solver for the size of a grid.
+    A grid with N^4 boxes is an N^2 x N^2 diagonal sudoku, e.g. 256 boxes for 16x16.
+    """
+    if len(grid) == len(boxes):
+        return TABLES, SOLVER, DLX
+    box_size = engine.box_size_of(grid)
+    if box_size not in _SIZED_SOLVERS:
+        tables = engine.get_tables(box_size)
+        _SIZED_SOLVERS[box_size] = (tables, engine.Solver(tables), dlx.DancingLinks(tables))
+    return _SIZED_SOLVERS[box_size]
+
+# Backends accepted by solve()
+ENGINES = ('propagation', 'dlx', 'sat')
+# SAT solvers by number of boxes, built on first use
+_SAT_SOLVERS = {}
+
+def _apply_rule(values, rule):
+    """
+    Run a rule of the bitmask engine on a values dictionary.
+    Args:
+        values(dict): a dictionary of the form {'box_name': '123456789', ...}
+        rule(function): a `engine.Solver` method that updates a list of masks in place
+    Returns:
+        The values dictionary, updated through assign_value, or False if the rule found a contradiction.
+    """
+    cells = TABLES.from_values(values)
+    result = rule(cells)
+    for box, value in zip(boxes, map(TABLES.mask_digits.__getitem__, cells)):
+        assign_value(values, box, value)
+    return values if result is not False else False
+
 def grid_values(grid):
     """
     Convert grid into a dict of {square: char} with '123456789' for empties.
@@ -44,20 +100,17 @@ def grid_values(grid):
             Keys: The boxes, e.g., 'A1'
             Values: The value in each box, e.g., '8'. If the box has no value, then the value will be '123456789'.
     """
-    dictionary = {}
-    for box, value in zip(boxes, grid):
-        if value == '.':
-            value = '123456789'
-        dictionary[box] = value
-    return dictionary
+    return TABLES.to_values(TABLES.parse(grid))
 
 def display(values):
     """
     Display the values as a 2-D grid.
     Args:
-        values(dict): The sudoku in dictionary form
+        values(dict): The sudoku in dictionary form, or as a list of candidate masks
     """
-    
+    if isinstance(values, list):
+        values = TABLES.to_values(values)
+
     width = 1+max(len(values[s]) for s in boxes)
     line = '+'.join(['-'*(width*3)]*3)
     for r in rows:
@@ -80,24 +133,7 @@ def naked_twins(values):
     Returns:
         the values dictionary with the naked twins eliminated from peers.
     """
-
-    # Find all instances of naked twins
-    for unit in unitlist: 
-        # List of all values (and their boxes) containing only 2 possibilities (candidates to be naked pair)
-        candidates = [(values[box], box) for box in unit if len(values[box]) == 2] 
-        if len(candidates) >= 2:
-            # Get pairs, if len(candidates > 2), then we need to make combinations to test each possible pair
-            pairs = [list(combination) for combination in itertools.combinations(candidates,2)]
-            for pair in pairs:
-                candidate1, candidate2 = pair[0], pair[1]
-                # Here we know if is a naked pair or not and then we eliminate it as possibilities for their peers 
-                if candidate1[0] == candidate2[0]: 
-                    for box in unit:
-                        # Ensure that we don't modify boxes with values already assigned or modify our naked pair
-                        if len(values[box]) >= 2 and candidate1[1] != box and candidate2[1] != box: 
-                            for digit in candidate1[0]:
-                                assign_value(values, box, values[box].replace(digit,""))
-    return values
+    return _apply_rule(values, _RULES.naked_twins)
 
 """
     Elimination - If a box has a value assgined, then none of the peers of this box can have this value
@@ -107,13 +143,10 @@ def eliminate(values):
 
     This function will iterate over all the boxes in the puzzle that only have one value 
     assigned to them, and it will remove this value from every one of its peers.
+    Returns False if a unit has the same value twice, or a box is left with no available values.
 
     """
-    for box, value in values.items():
-        if len(value) == 1: 
-            for peer in peers[box]:
-                assign_value(values, peer, values[peer].replace(value,""))
-    return values
+    return _apply_rule(values, _RULES.eliminate)
 
 """
     Only choice - Every unit must contain exactly one occurrence of every number 
@@ -123,83 +156,127 @@ def only_choice(values):
 
     This function will go through all the units, with a digit that only fits in one possible 
     box, it will assing that digit to that box.
+    Returns False if a unit has a digit that fits in none of its boxes.
 
     """
-    for unit in unitlist:
-        for digit in '123456789':
-            dplaces = [box for box in unit if digit in values[box]]
-            if len(dplaces) == 1:
-                assign_value(values, dplaces[0], digit)
-                #values[dplaces[0]] = digit
-    return values
+    return _apply_rule(values, _RULES.only_choice)
 
 """
     Constraint propagation - Is all about using local constraints in a space to dramatically reduce the search space.
        As we enforce each constraint, we see how it introduces new constraints for other parts of the board that can 
        help us further reduce the number of possibilities.
 """
-def reduce_puzzle(values): # def reduce_puzzle(values, is_diagonal):
-    stalled = False
-    while not stalled:
-        # Check how many boxes have a determined value 
-        solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
-        # Apply constraints 
-        values = naked_twins(only_choice(eliminate(values)))
-        # Check how many boxes have a determined value, to compare
-        solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
-        # If no new values were added, stop the loop
-        stalled = solved_values_before == solved_values_after
-        # Sanity check, return False if there is a box with zero available values
-        if len([box for box in values.keys() if len(values[box]) == 0]):
-            return False # This means probably that the sudoku is not a X Sudoku (diagonal)
-    return values
+def reduce_puzzle(values):
+    """
+    Apply eliminate, only_choice and naked_twins until no new box is solved.
+    Returns False if there is a box with zero available values.
+    """
+    return _apply_rule(values, _RULES.reduce_puzzle)
 
 """
     Search using Depth-First Search algorithm - without this strategy, we didn't solve hard tests. It seemed to reduce 
        every box to a number of possibilities, but it won't go further than that.
 """
 def search(values): 
-    # First reduce the puzzle using constraint propagation function
-    values = reduce_puzzle(values)
-    if values == False:
+    """
+    Solve the values with constraint propagation and depth-first search on the unfilled box with the fewest
+    possibilities. Returns the solved values dictionary, or False if there is no solution.
+    """
+    cells = SOLVER.solve(TABLES.from_values(values))
+    if not cells:
         return False
+    return TABLES.to_values(cells)
 
-    if all(len(values[s]) == 1 for s in boxes):
-        return values ## That means Soduku was solved!
-
-    # Select one of the unfilled squares with the fewest posibilities
-    n,s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
-
-    # Now use recursion to solve each one of the resulting Sudokus, and if one returns a value (not False) return that answer 
-    for value in values[s]:
-        new_sudoku = values.copy()
-        new_sudoku[s] = value
-        attempt = search(new_sudoku)
-        if attempt:
-            return attempt
-
-def solve(grid):
+def solve(grid, engine='propagation', recorder=None, cache=None, hooks=None):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+            Grids of 256 or 625 characters are 16x16 and 25x25 sudokus, using the symbols in
+            engine.SYMBOLS, and are solved with the tables of that size.
+        engine(string): 'propagation' for constraint propagation and search, 'dlx' for the
+            Dancing Links exact cover solver, or 'sat' for the CNF encoding and SAT solver.
+        recorder(Recorder): optional; records every change the propagation engine makes, for
+            visualize_assignments. Solving without one records nothing.
+        cache(cache.SolutionCache): optional; answers puzzles that are the same as an earlier
+            one up to a symmetry and a relabeling of the digits without solving them. A
+            puzzle answered from the cache records nothing.
+        hooks(hooks.Hooks): optional; receives the propagation passes, branches, backtracks and
+            solution of the propagation engine, e.g. a hooks.StatsCollector.
     Returns:
         The dictionary representation of the final sudoku grid. False if no solution exists.
     """
-    values = search(grid_values(grid))
-    if not values:
+    tables, solver, exact_cover = _solvers(grid)
+    if engine not in ENGINES:
+        raise ValueError('Unknown engine {!r}, expected one of {}'.format(engine, ENGINES))
+    if cache is not None and cache.tables is not tables:
+        raise ValueError('The cache is for grids of {} boxes'.format(len(cache.tables.boxes)))
+
+    def solve_cells(cells):
+        if engine == 'dlx':
+            return exact_cover.solve(cells)
+        if engine == 'sat':
+            if len(cells) not in _SAT_SOLVERS:
+                _SAT_SOLVERS[len(cells)] = sat.SatSudoku(tables)
+            return _SAT_SOLVERS[len(cells)].solve(cells)
+        solver.recorder = recorder
+        solver.hooks = hooks
+        try:
+            return solver.solve(cells)
+        finally:
+            solver.recorder = None
+            solver.hooks = None
+
+    if cache is not None:
+        cells = cache.solve(tables.parse(grid), solve_cells)
+    else:
+        cells = solve_cells(tables.parse(grid))
+    if not cells:
         return False # No solution
 
-    return values
+    return tables.to_values(cells)
+
+def solve_batch(grids):
+    """
+    Solve a list of Sudoku grids together with the NumPy engine in vectorized.py, which propagates
+    constraints over the whole batch at once.
+    Args:
+        grids(list): strings representing sudoku grids, all of the same size.
+    Returns:
+        A list with the dictionary representation of each solved grid, or False if it has no solution.
+    """
+    if not grids:
+        return []
+    tables = _solvers(grids[0])[0]
+    if tables not in _BATCH_SOLVERS:
+        import vectorized
+        _BATCH_SOLVERS[tables] = vectorized.BatchSolver(tables)
+    return [tables.to_values(cells) if cells else False for cells in _BATCH_SOLVERS[tables].solve(grids)]
+
+def count_solutions(grid, limit=2):
+    """
+    Count the solutions of a Sudoku grid with the Dancing Links solver.
+    Args:
+        grid(string): a string representing a sudoku grid.
+        limit(int): stop counting once this many solutions are found.
+    Returns:
+        The number of solutions, at most limit. A well-formed puzzle has exactly one.
+    """
+    tables, _, exact_cover = _solvers(grid)
+    return exact_cover.count(tables.parse(grid), limit)
 
 if __name__ == '__main__':
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
-    display(solve(diag_sudoku_grid))
+    recorder = Recorder(TABLES)
+    display(solve(diag_sudoku_grid, recorder=recorder))
+    print('Rule firings: ' + ', '.join('{}={}'.format(rule, SOLVER.counts[rule]) for rule in SOLVER.RULES))
 
     try:
+        import sys
         from visualize import visualize_assignments
-        visualize_assignments(assignments)
+        # python solution.py solve.gif (or a directory) renders headless instead of opening a window
+        visualize_assignments(recorder, sys.argv[1] if len(sys.argv) > 1 else None)
 
     except SystemExit:
         pass
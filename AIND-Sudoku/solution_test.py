@@ -1,5 +1,25 @@
+import batch
+import cache
+import dlx
+import engine
+import generator
+import harness
+import hooks
+import os
+import parallel
+import random
+import rules
+import sat
+import shutil
 import solution
+import tempfile
 import unittest
+import variants
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -76,7 +96,6 @@ class TestNakedTwins(unittest.TestCase):
                         "Your naked_twins function produced an unexpected board.")
 
 
-
 class TestDiagonalSudoku(unittest.TestCase):
     diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     solved_diag_sudoku = {'G7': '8', 'G6': '9', 'G5': '7', 'G4': '3', 'G3': '2', 'G2': '4', 'G1': '6', 'G9': '5',
@@ -94,5 +113,485 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+
+class TestBitmaskEngine(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_masks_round_trip(self):
+        values = solution.grid_values(self.grid)
+        cells = solution.TABLES.from_values(values)
+        self.assertEqual(cells, solution.TABLES.parse(self.grid))
+        self.assertEqual(solution.TABLES.to_values(cells), values)
+        self.assertEqual(cells[0], 1 << 1)
+        self.assertEqual(cells[1], solution.TABLES.all_digits)
+
+    def test_tables(self):
+        tables = solution.TABLES
+        for box in ('A1', 'E5', 'C7'):
+            i = tables.index[box]
+            self.assertEqual(set(tables.boxes[p] for p in tables.peers[i]), solution.peers[box])
+        self.assertEqual(tables.popcount[0b101100], 3)
+        self.assertEqual(tables.lowest_digit[0b101100], 2)
+        self.assertEqual(tables.mask_digits[0b101100], '346')
+
+    def test_contradiction(self):
+        # two 2s in the first row
+        self.assertFalse(solution.solve('22' + '.' * 79))
+
+    def test_rule_contradictions(self):
+        self.assertFalse(solution.eliminate(solution.grid_values('22' + '.' * 79)))
+        # 1 fits in no box of the first row
+        values = solution.grid_values('.' * 81)
+        for box in solution.row_units[0]:
+            values[box] = '23456789'
+        self.assertFalse(solution.only_choice(values))
+
+    def test_rule_counts(self):
+        solution.solve(self.grid)
+        counts = dict(solution.SOLVER.counts)
+        self.assertEqual(set(counts), set(['eliminate', 'only_choice', 'naked_twins']))
+        self.assertTrue(counts['eliminate'] > 0 and counts['only_choice'] > 0)
+        solution.solve(self.grid)
+        self.assertEqual(solution.SOLVER.counts, counts)
+
+    def test_search_in_place(self):
+        cells = solution.TABLES.parse('.' * 81)
+        self.assertIs(solution.SOLVER.solve(cells), cells)
+        self.assertTrue(solution.SOLVER.guesses > 0)
+        values = solution.TABLES.to_values(cells)
+        for unit in solution.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), list('123456789'))
+
+
+class TestDancingLinks(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine='dlx'),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_count_solutions(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=3), 3)
+        self.assertEqual(solution.count_solutions('22' + '.' * 79), 0)
+
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, solution.solve, self.diagonal_grid, engine='magic')
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_solve_chunk(self):
+        results = batch.solve_chunk([TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79, '2..'], 'dlx')
+        values = TestDiagonalSudoku.solved_diag_sudoku
+        self.assertEqual([grid for grid, _ in results],
+                         [''.join(values[box] for box in solution.boxes), None, None])
+
+    def test_latency_percentiles(self):
+        histogram = batch.LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000.)
+        self.assertAlmostEqual(histogram.percentile(50), 0.050, delta=0.0025)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.005)
+
+
+@unittest.skipIf(numpy is None, "the vectorized engine needs numpy")
+class TestVectorized(unittest.TestCase):
+
+    def test_solve_batch(self):
+        grids = [TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79, '.' * 81]
+        results = solution.solve_batch(grids)
+        self.assertEqual(results[0], TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertFalse(results[1])
+        for unit in solution.unitlist:
+            self.assertEqual(sorted(results[2][box] for box in unit), list('123456789'))
+
+    def test_propagation_matches_engine(self):
+        import vectorized
+        batch_solver = vectorized.BatchSolver(solution.TABLES)
+        grids = [TestDiagonalSudoku.diagonal_grid, '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......']
+        candidates, invalid = batch_solver.propagate(batch_solver.parse(grids))
+        self.assertEqual(candidates.shape, (2, 81, 9))
+        for grid, masks, failed in zip(grids, batch_solver.to_masks(candidates).tolist(), invalid):
+            cells = solution.TABLES.parse(grid)
+            self.assertEqual(engine.Solver(solution.TABLES).reduce_puzzle(cells), not failed)
+            if not failed:
+                self.assertEqual(masks, cells)
+
+
+class TestLargerGrids(unittest.TestCase):
+
+    def check_solution(self, grid, values):
+        tables = solution.engine.get_tables(solution.engine.box_size_of(grid))
+        for i, box in enumerate(tables.boxes):
+            self.assertTrue(grid[i] in ('.', values[box]))
+        for unit in tables.units:
+            self.assertEqual(sorted(values[tables.boxes[i]] for i in unit), sorted(tables.digits))
+
+    def diagonal_grid(self, box_size):
+        digits = solution.engine.SYMBOLS[:box_size ** 2][::-1]
+        return ''.join(digits[r] if r == c else '.' for r in range(len(digits)) for c in range(len(digits)))
+
+    def test_tables_cached(self):
+        self.assertIs(solution.engine.get_tables(4), solution.engine.get_tables(4))
+        self.assertIs(solution.engine.get_tables(3), solution.TABLES)
+        self.assertEqual(solution.engine.get_tables(4).digits, '123456789ABCDEFG')
+
+    def test_solve_16x16(self):
+        grid = self.diagonal_grid(4)
+        for engine in solution.ENGINES:
+            self.check_solution(grid, solution.solve(grid, engine=engine))
+
+    def test_solve_25x25(self):
+        grid = self.diagonal_grid(5)
+        self.check_solution(grid, solution.solve(grid))
+        tables = solution.engine.get_tables(5)
+        self.assertEqual(tables.popcount[(1 << 25) - 1], 25)
+        self.assertEqual(tables.mask_digits[1 << 24 | 1], '1P')
+
+    def test_bad_size(self):
+        self.assertRaises(ValueError, solution.solve, '.' * 80)
+
+
+class TestRecorder(unittest.TestCase):
+    grid = '..9...3..3............72....1....5....6........25...74.......86...........4.2.1..'
+
+    def replay(self, recorder):
+        solved = solution.solve(self.grid, recorder=recorder)
+        frames = list(recorder.frames())
+        self.assertEqual(frames[-1], solved)
+        return frames
+
+    def test_no_recording_by_default(self):
+        solution.solve(self.grid)
+        solution.reduce_puzzle(solution.grid_values(self.grid))
+        self.assertIsNone(solution.assignment_recorder)
+        self.assertIsNone(solution.SOLVER.recorder)
+
+    def test_assign_value(self):
+        values = solution.grid_values(self.grid)
+        start = dict(values)
+        solution.assignment_recorder = solution.Recorder(solution.TABLES, capacity=None)
+        try:
+            solution.reduce_puzzle(values)
+            recorder = solution.assignment_recorder
+        finally:
+            solution.assignment_recorder = None
+        self.assertEqual(recorder.tables.to_values(recorder.base), start)
+        cells = list(recorder.base)
+        for i, _, new in recorder.deltas():
+            cells[i] = new
+        self.assertEqual(solution.TABLES.to_values(cells), values)
+
+    def test_deltas(self):
+        recorder = solution.Recorder(solution.TABLES, capacity=None)
+        frames = self.replay(recorder)
+        self.assertEqual(frames[0], solution.grid_values(self.grid))
+        # the search backtracks on this puzzle, so some deltas undo others
+        self.assertTrue(any(solution.TABLES.popcount[new] > solution.TABLES.popcount[old]
+                            for _, old, new in recorder.deltas()))
+
+    def test_ring_buffer(self):
+        recorder = solution.Recorder(solution.TABLES, capacity=50)
+        self.replay(recorder)
+        self.assertTrue(recorder.count > 50)
+        self.assertEqual(len(list(recorder.deltas())), 50)
+
+    def test_file(self):
+        recorder = solution.Recorder(solution.TABLES, path='')
+        try:
+            self.replay(recorder)
+            self.assertEqual(len(list(recorder.deltas())), recorder.count)
+        finally:
+            recorder.close()
+            os.remove(recorder.path)
+
+
+class TestRules(unittest.TestCase):
+    corpus = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles', 'hard_diagonal.txt')
+
+    def setUp(self):
+        with open(self.corpus) as corpus:
+            self.grids = [line.strip() for line in corpus if not line.startswith('#')][:5]
+
+    def test_each_rule(self):
+        for name in rules.RULE_NAMES:
+            solver = engine.Solver(solution.TABLES, rules=[name], timing=True)
+            for grid in self.grids:
+                cells = solver.solve(solution.TABLES.parse(grid))
+                self.assertEqual(solution.TABLES.to_values(cells), solution.solve(grid, engine='dlx'))
+            self.assertEqual(set(solver.times), set(solver.counts))
+            self.assertIn(name, solver.counts)
+
+    def test_fewer_guesses(self):
+        basic = engine.Solver(solution.TABLES)
+        advanced = engine.Solver(solution.TABLES, rules=rules.RULE_NAMES)
+        guesses = [0, 0]
+        for grid in self.grids:
+            for k, solver in enumerate([basic, advanced]):
+                solver.solve(solution.TABLES.parse(grid))
+                guesses[k] += solver.guesses
+        self.assertLess(guesses[1], guesses[0])
+
+    def test_unknown_rule(self):
+        self.assertRaises(ValueError, engine.Solver, solution.TABLES, rules=['y_wing'])
+
+    def test_large_grid(self):
+        # 25x25 units would need tables of 2^25 position masks
+        tables = engine.get_tables(5)
+        grid = tables.to_grid(engine.Solver(tables).solve(tables.parse('.' * 625)))
+        cells = tables.parse(''.join('.' if i % 3 == 0 else digit for i, digit in enumerate(grid)))
+        solver = engine.Solver(tables, rules=rules.RULE_NAMES)
+        self.assertTrue(solver.reduce_puzzle(cells))
+        self.assertEqual(tables.to_grid(cells), grid)
+
+
+class TestHarness(unittest.TestCase):
+    tiers = [('easy', 36), ('extreme', None)]
+
+    def test_reproducible_corpus(self):
+        corpus = generator.generate_corpus(random.Random(1), 1, tiers=self.tiers)
+        self.assertEqual(corpus, generator.generate_corpus(random.Random(1), 1, tiers=self.tiers))
+        self.assertEqual([(puzzle['tier'], puzzle['diagonal']) for puzzle in corpus],
+                         [('easy', True), ('extreme', True), ('easy', False), ('extreme', False)])
+        for puzzle in corpus:
+            tables = engine.get_tables(3, puzzle['diagonal'])
+            cells = tables.parse(puzzle['grid'])
+            self.assertEqual(dlx.DancingLinks(tables).count(cells), 1)
+        self.assertEqual(81 - corpus[0]['grid'].count('.'), 36)
+
+    def test_results(self):
+        corpus = generator.generate_corpus(random.Random(1), 1, (True,), self.tiers)
+        results = harness.run(corpus, harness.ENGINES, 1)
+        self.assertEqual(len(results), 2 * len(harness.ENGINES))
+        self.assertTrue(all(result['solved'] for result in results))
+        self.assertIsNone(results[1]['passes'])
+        summary = harness.summarize(results)
+        self.assertEqual(summary['propagation/diagonal/easy']['count'], 1)
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_chunk(self):
+        puzzles = generator.generate_chunk(2, 0, 3)
+        self.assertEqual(puzzles, generator.generate_chunk(2, 0, 3))
+        self.assertNotEqual(puzzles, generator.generate_chunk(2, 1, 3))
+        ratings = [name for name, _ in generator.RATINGS]
+        checker = generator.Generator()
+        for grid, rating in puzzles:
+            cells = solution.TABLES.parse(grid)
+            self.assertTrue(checker.is_unique(cells))
+            self.assertIn(rating, ratings)
+            # a minimal puzzle has no clue to spare
+            for i in range(len(cells)):
+                if grid[i] != '.':
+                    fewer = list(cells)
+                    fewer[i] = solution.TABLES.all_digits
+                    self.assertFalse(checker.is_unique(fewer))
+
+    def test_rate(self):
+        rater = generator.Generator()
+        # eliminate and only choice solve it, whether or not naked twins also fire
+        self.assertEqual(rater.rate(solution.TABLES.parse(TestDiagonalSudoku.diagonal_grid)), 'easy')
+        grid = '9........5........7.49........2..1......31............2...5...73...........46..8.'
+        self.assertEqual(rater.rate(solution.TABLES.parse(grid)), 'medium')
+        with open(TestRules.corpus) as corpus:
+            grid = [line.strip() for line in corpus if not line.startswith('#')][0]
+        self.assertEqual(rater.rate(solution.TABLES.parse(grid)), 'extreme')
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        with open(TestRules.corpus) as corpus:
+            self.grid = [line.strip() for line in corpus if not line.startswith('#')][0]
+
+    def test_frontier(self):
+        solved, subproblems = parallel.frontier(engine.Solver(solution.TABLES),
+                                                solution.TABLES.parse(self.grid), 8)
+        self.assertIsNone(solved)
+        self.assertTrue(len(subproblems) >= 8)
+        # exactly one subproblem holds the unique solution
+        self.assertEqual(sum(1 for cells in subproblems if engine.Solver(solution.TABLES).search(cells)), 1)
+
+    def test_solve(self):
+        with parallel.ParallelSolver(workers=2) as solver:
+            cells = solver.solve(solution.TABLES.parse(self.grid))
+            self.assertEqual(solution.TABLES.to_values(cells), solution.solve(self.grid))
+            self.assertFalse(solver.solve(solution.TABLES.parse('22' + '.' * 79)))
+            cells = solver.solve(solution.TABLES.parse(TestDiagonalSudoku.diagonal_grid))
+            self.assertEqual(solution.TABLES.to_values(cells), TestDiagonalSudoku.solved_diag_sudoku)
+
+
+class TestCache(unittest.TestCase):
+    grid = TestDiagonalSudoku.diagonal_grid
+
+    def variant(self, symmetry, digits):
+        renaming = dict(zip('123456789', digits), **{'.': '.'})
+        return ''.join(renaming[self.grid[i]] for i in symmetry)
+
+    def test_symmetries(self):
+        symmetries = cache.symmetries(solution.TABLES)
+        self.assertEqual(len(symmetries), 96)
+        units = set(frozenset(unit) for unit in solution.TABLES.units)
+        for symmetry in symmetries:
+            position = dict((box, k) for k, box in enumerate(symmetry))
+            self.assertTrue(all(frozenset(position[i] for i in unit) in units for unit in units))
+
+    def test_isomorphic_hit(self):
+        solutions = cache.SolutionCache(solution.TABLES)
+        symmetries = cache.symmetries(solution.TABLES)
+        self.assertEqual(solution.solve(self.grid, cache=solutions), TestDiagonalSudoku.solved_diag_sudoku)
+        for symmetry, digits in [(symmetries[5], '987654321'), (symmetries[-1], '531246978')]:
+            variant = self.variant(symmetry, digits)
+            self.assertEqual(solution.solve(variant, cache=solutions), solution.solve(variant))
+        self.assertEqual((solutions.hits, solutions.misses), (2, 1))
+        self.assertFalse(solution.solve('22' + '.' * 79, cache=solutions))
+        self.assertRaises(ValueError, solution.solve, '.' * 256, cache=solutions)
+
+    def test_record_miss(self):
+        # a miss solves the given grid, not its canonical form
+        variant = self.variant(cache.symmetries(solution.TABLES)[5], '987654321')
+        cells = solution.TABLES.parse(variant)
+        recorder = solution.Recorder(solution.TABLES, capacity=None)
+        solved = solution.solve(variant, cache=cache.SolutionCache(solution.TABLES), recorder=recorder)
+        self.assertEqual(solved, solution.solve(variant))
+        self.assertEqual(recorder.base, cells)
+        box, old, new = next(recorder.deltas())
+        self.assertEqual(old, cells[box])
+        self.assertEqual(new & ~old, 0)
+
+    def test_store(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'solutions')
+            solutions = cache.SolutionCache(solution.TABLES, path=path)
+            solution.solve(self.grid, cache=solutions)
+            solutions.close()
+            solutions = cache.SolutionCache(solution.TABLES, path=path)
+            variant = self.variant(cache.symmetries(solution.TABLES)[7], '234567891')
+            self.assertEqual(solution.solve(variant, cache=solutions), solution.solve(variant))
+            self.assertEqual((solutions.hits, solutions.misses), (1, 0))
+            solutions.close()
+            # a store of diagonal solutions is not valid for standard puzzles
+            self.assertRaises(ValueError, cache.SolutionCache, engine.get_tables(3, False), path=path)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_layouts(self):
+        standard = engine.get_tables(3, False)
+        self.assertNotEqual(cache.layout_fingerprint(standard), cache.layout_fingerprint(solution.TABLES))
+        copy = engine.Tables(solution.TABLES.boxes, [[solution.TABLES.boxes[i] for i in unit]
+                                                     for unit in solution.TABLES.units], solution.TABLES.digits)
+        self.assertIs(cache.symmetries(copy), cache.symmetries(solution.TABLES))
+
+
+class TestSat(unittest.TestCase):
+
+    def test_solver(self):
+        solver = sat.SatSolver(3, [[1, 2], [-1, 2], [-2, 3], [-3, -1]])
+        self.assertEqual(solver.solve(), set([2, 3]))
+        self.assertIsNone(solver.solve([-3]))
+        self.assertEqual(solver.solve([-1]), set([2, 3]))
+
+    def test_cnf(self):
+        num_vars, clauses = sat.sudoku_cnf(solution.TABLES)
+        self.assertEqual(num_vars, 81 * 9)
+        # exactly one per box and per unit and digit: 1 + 36 clauses each
+        self.assertEqual(len(clauses), (81 + 29 * 9) * 37)
+
+    def test_solve(self):
+        with open(TestRules.corpus) as corpus:
+            grids = [line.strip() for line in corpus if not line.startswith('#')][:5]
+        for grid in grids + [TestDiagonalSudoku.diagonal_grid]:
+            self.assertEqual(solution.solve(grid, engine='sat'), solution.solve(grid, engine='dlx'))
+        self.assertFalse(solution.solve('22' + '.' * 79, engine='sat'))
+        standard = engine.get_tables(3, False)
+        grid = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+        self.assertEqual(sat.SatSudoku(standard).solve(standard.parse(grid)),
+                         dlx.DancingLinks(standard).solve(standard.parse(grid)))
+
+
+class TestVariants(unittest.TestCase):
+    # the squares moved one column to the right, wrapping around
+    shifted = ''.join('ABCDEFGHI'[(r // 3) * 3 + ((c - 1) % 9) // 3] for r in range(9) for c in range(9))
+
+    def assertUnits(self, values, variant):
+        for unit in variant.tables.units:
+            self.assertEqual(set(values[variant.tables.boxes[i]] for i in unit), set('123456789'))
+
+    def test_jigsaw(self):
+        variant = variants.Variant(regions=self.shifted)
+        values = variant.solve()
+        self.assertUnits(values, variant)
+        self.assertRaises(ValueError, variants.Variant, regions='A' * 81)
+
+    def test_extra_units(self):
+        diagonals = solution.diagonal_units
+        variant = variants.Variant(extra_units=diagonals)
+        self.assertEqual(variant.solve(TestDiagonalSudoku.diagonal_grid), TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertRaises(ValueError, variants.Variant, extra_units=[['A1', 'A2']])
+
+    def test_killer(self):
+        solved = TestDiagonalSudoku.solved_diag_sudoku
+        # cages over the boxes 1-2, 3-4, 5-6 and 7-8 of every row, and box 9 alone
+        pairs = [unit[i:i + 2] for unit in solution.row_units for i in range(0, 9, 2)]
+        cages = [(sum(int(solved[box]) for box in pair), pair) for pair in pairs]
+        variant = variants.Variant(cages=cages, diagonal=True)
+        values = variant.solve()
+        self.assertUnits(values, variant)
+        for total, pair in cages:
+            self.assertEqual(sum(int(values[box]) for box in pair), total)
+        self.assertEqual(variants.cage_combinations(9, 2, 4), (0b101,))
+        self.assertRaises(ValueError, variants.Variant, cages=[(2, ['A1', 'A2'])])
+
+
+class TestHooks(unittest.TestCase):
+
+    def test_collector(self):
+        with open(TestRules.corpus) as corpus:
+            grid = [line.strip() for line in corpus if not line.startswith('#')][0]
+        collector = hooks.StatsCollector()
+        self.assertEqual(solution.solve(grid, hooks=collector), solution.solve(grid))
+        solved = collector.puzzles[0]
+        self.assertTrue(solved['solved'])
+        self.assertEqual(solved['branches'], solution.SOLVER.guesses)
+        self.assertEqual(solved['propagations'], solved['branches'] + 1)
+        self.assertEqual(solved['rules'], solution.SOLVER.counts)
+        solution.solve('22' + '.' * 79, hooks=collector)
+        self.assertIsNone(solution.SOLVER.hooks)
+        failed = collector.puzzles[1]
+        self.assertFalse(failed['solved'])
+        self.assertEqual(failed['propagations'], 1)
+        summary = collector.summary()
+        self.assertEqual((summary['puzzles'], summary['solved']), (2, 1))
+
+    def test_rule(self):
+        class RuleLog(hooks.Hooks):
+            def __init__(self):
+                self.calls = []
+
+            def rule(self, solver, name, cells):
+                self.calls.append((name, dict(solver.counts)))
+
+        log = RuleLog()
+        solver = engine.Solver(solution.TABLES, rules=['hidden_pairs'], hooks=log)
+        with open(TestRules.corpus) as corpus:
+            grid = [line.strip() for line in corpus if not line.startswith('#')][0]
+        solver.solve(solution.TABLES.parse(grid))
+        self.assertEqual(set(name for name, _ in log.calls), set(solver.rule_names))
+        self.assertEqual(log.calls[-1][1], solver.counts)
+        # between two calls, only the counter of the rule that just ran moves
+        previous = dict.fromkeys(solver.rule_names, 0)
+        for name, counts in log.calls:
+            self.assertEqual([rule for rule in counts if counts[rule] != previous[rule]],
+                             [name] if counts[name] != previous[name] else [])
+            previous = counts
+
+    def test_no_op(self):
+        solver = engine.Solver(solution.TABLES, hooks=hooks.Hooks())
+        cells = solver.solve(solution.TABLES.parse(TestDiagonalSudoku.diagonal_grid))
+        self.assertEqual(solution.TABLES.to_values(cells), TestDiagonalSudoku.solved_diag_sudoku)
+
 if __name__ == '__main__':
     unittest.main()
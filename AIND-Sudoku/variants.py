@@ -0,0 +1,158 @@
+"""
+Sudoku variants described by a specification and compiled to the same
+integer tables as classic and diagonal Sudoku.
+
+A `Variant` starts from the rows and columns of an N^2 x N^2 grid and adds:
+
+    regions: the units that replace the squares, for jigsaw Sudoku, as a
+        list of lists of box names or as a string with one region label per
+        box, e.g. 'AAABBBCCC...'
+    extra_units: more units of N^2 boxes that hold every digit once, like
+        the diagonals of diagonal Sudoku or the windows of Windoku
+    cages: (total, boxes) pairs for Killer Sudoku; the digits of a cage are
+        all different and add up to the total, or are only all different
+        when the total is None
+
+Every unit, square or region or extra, goes into an `engine.Tables`, so the
+propagation and search run exactly as fast on a variant as on the classic
+grid. The cages become one `CageRule` that the solver runs with its other
+extra rules. For every cage size and total, the sets of digits that add up
+to the total are enumerated once as candidate masks, so keeping the
+candidates of a cage consistent is a few bitwise tests per combination.
+"""
+import itertools
+
+import engine
+import rules
+
+# Candidate masks of the sets of different digits with each (digits, size, total)
+_COMBINATIONS = {}
+
+
+def cage_combinations(num_digits, size, total):
+    """Return the candidate masks of every set of `size` different digits
+    from 1 to `num_digits` that add up to `total`.
+    """
+    key = (num_digits, size, total)
+    if key not in _COMBINATIONS:
+        _COMBINATIONS[key] = tuple(sum(1 << (d - 1) for d in digits)
+                                   for digits in itertools.combinations(range(1, num_digits + 1), size)
+                                   if sum(digits) == total)
+    return _COMBINATIONS[key]
+
+
+class CageRule(rules.Rule):
+    """Killer cages: different digits in every cage, and digits from a set
+    that adds up to the total of the cage.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+        cages(list): (boxes, combinations) pairs, with the box indices of a
+            cage and the candidate masks of its digit sets, or None for a
+            cage without a total
+    """
+    name = 'cages'
+
+    def __init__(self, tables, cages):
+        rules.Rule.__init__(self, tables)
+        self.cages = cages
+
+    def __call__(self, solver, cells):
+        popcount = self.tables.popcount
+        for boxes, combinations in self.cages:
+            # a digit placed in a box of the cage goes from the other boxes
+            placed = 0
+            for i in boxes:
+                mask = cells[i]
+                if popcount[mask] == 1:
+                    if mask & placed:
+                        return False
+                    placed |= mask
+            union = 0
+            for i in boxes:
+                mask = cells[i]
+                if popcount[mask] > 1 and mask & placed:
+                    mask &= ~placed
+                    if not mask:
+                        return False
+                    solver._assign(cells, i, mask, self.name)
+                union |= mask
+            if combinations is None:
+                continue
+            # the digit sets that every box of the cage can still take part in
+            allowed = 0
+            for combination in combinations:
+                if combination & union == combination and placed & combination == placed:
+                    for i in boxes:
+                        if not cells[i] & combination:
+                            break
+                    else:
+                        allowed |= combination
+            if not allowed:
+                return False
+            for i in boxes:
+                mask = cells[i]
+                if mask & ~allowed:
+                    solver._assign(cells, i, mask & allowed, self.name)
+        return True
+
+
+class Variant(object):
+    """A Sudoku variant compiled to lookup tables and a cage rule.
+
+    Args:
+        box_size(int): N, for N^2 x N^2 grids
+        regions: optional; the units replacing the squares, as a list of lists
+            of box names or a string of one region label per box
+        extra_units(list): optional; more units of N^2 box names
+        cages(list): optional; (total, box names) pairs, with None as the total
+            of a cage that only needs different digits
+        diagonal(bool): whether the two main diagonals are units
+    """
+
+    def __init__(self, box_size=3, regions=None, extra_units=(), cages=(), diagonal=False):
+        boxes, unitlist, digits = engine.layout(box_size, diagonal)
+        size = len(digits)
+        if regions is not None:
+            if isinstance(regions, str):
+                if len(regions) != len(boxes):
+                    raise ValueError('The region map has {} labels for {} boxes'.format(
+                        len(regions), len(boxes)))
+                labels = sorted(set(regions))
+                regions = [[box for box, label in zip(boxes, regions) if label == region]
+                           for region in labels]
+            if sorted(box for region in regions for box in region) != sorted(boxes):
+                raise ValueError('The regions do not cover every box exactly once')
+            # the squares follow the rows and columns in the units of layout()
+            unitlist = unitlist[:2 * size] + [list(region) for region in regions] + unitlist[3 * size:]
+        for unit in list(regions or []) + list(extra_units):
+            if len(set(unit)) != size or not set(unit) <= set(boxes):
+                raise ValueError('A unit needs {} different boxes of the grid: {}'.format(size, unit))
+        self.tables = engine.Tables(boxes, unitlist + [list(unit) for unit in extra_units], digits)
+
+        self.cages = []
+        for total, cage in cages:
+            if len(set(cage)) != len(cage) or not set(cage) <= set(boxes):
+                raise ValueError('A cage needs different boxes of the grid: {}'.format(cage))
+            combinations = None
+            if total is not None:
+                combinations = cage_combinations(size, len(cage), total)
+                if not combinations:
+                    raise ValueError('No {} different digits add up to {}'.format(len(cage), total))
+            self.cages.append((tuple(self.tables.index[box] for box in cage), combinations))
+        self.rule = CageRule(self.tables, self.cages) if self.cages else None
+
+    def solver(self, names=()):
+        """Return an `engine.Solver` for the variant, with the cage rule after
+        the extra rules called `names`.
+        """
+        return engine.Solver(self.tables, rules=list(names) + ([self.rule] if self.rule else []))
+
+    def solve(self, grid=None):
+        """Solve a grid string of the variant, by default an empty grid.
+        Returns:
+            The values dictionary of the solution, or False if there is none.
+        """
+        grid = grid or '.' * len(self.tables.boxes)
+        cells = self.solver().solve(self.tables.parse(grid))
+        return self.tables.to_values(cells) if cells else False
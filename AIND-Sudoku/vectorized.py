@@ -0,0 +1,164 @@
+"""
+NumPy engine that propagates constraints over a whole batch of puzzles at once.
+
+A batch is an (N, boxes, digits) boolean array of candidates. Elimination,
+hidden singles (only_choice) and naked pairs are applied to every puzzle of
+the batch together as array operations over index arrays built from the units
+of an `engine.Tables`, until no puzzle changes. The puzzles that are still
+unsolved afterwards are finished one at a time by the search of
+`engine.Solver`.
+
+During propagation the digits axis is packed into the same candidate masks as
+`engine.Tables` uses, an (N, boxes) int array, because the bitwise ufuncs on
+packed masks are several times faster than reductions over the boolean axis.
+
+Units are padded with a sentinel unit (index `len(units)`) so that every box
+has the same number of units, since the boxes on the diagonals belong to more
+units than the others.
+"""
+import numpy as np
+
+import engine
+
+
+class BatchSolver(object):
+    """Vectorized constraint propagation for batches of puzzles.
+
+    Args:
+        tables(engine.Tables): the lookup tables of the puzzle layout
+        max_passes(int): the most propagation passes made over a batch
+    """
+
+    def __init__(self, tables, max_passes=100):
+        self.tables = tables
+        self.max_passes = max_passes
+        self.search = engine.Solver(tables)
+        num_digits = len(tables.digits)
+        self.units = np.array(tables.units, dtype=np.intp)
+        sentinel = len(tables.units)
+        most = max(len(units) for units in tables.cell_units)
+        self.cell_units = np.array([list(units) + [sentinel] * (most - len(units))
+                                    for units in tables.cell_units], dtype=np.intp)
+        self.bits = 1 << np.arange(num_digits, dtype=np.int64)
+        self.all_digits = tables.all_digits
+        # popcounts of 16-bit halves, as the table of 25 digits would have 2^25 entries
+        self.wide = num_digits > 16
+        self.popcount_table = np.array([bin(mask).count('1') for mask in range(
+            1 << min(num_digits, 16))], dtype=np.int64)
+        # the unit-position pairs used to find naked pairs
+        size = self.units.shape[1]
+        self.not_self = ~np.eye(size, dtype=bool)
+
+    def parse(self, grids):
+        """Convert a list of grid strings into an (N, boxes, digits) candidate array. """
+        masks = np.array([self.tables.parse(grid) for grid in grids], dtype=np.int64)
+        return self.from_masks(masks)
+
+    def from_masks(self, masks):
+        return (masks[..., None] & self.bits) != 0
+
+    def to_masks(self, candidates):
+        return candidates.astype(np.int64).dot(self.bits)
+
+    def popcount(self, codes):
+        """Return the number of candidates of every mask in an int array. """
+        table = self.popcount_table
+        if self.wide:
+            return table[codes & 0xFFFF] + table[codes >> 16]
+        return table[codes]
+
+    def _gather_units(self, per_unit):
+        """Combine a per-unit (N, units) array into a per-box (N, boxes, units
+        per box) array, with zeros for the sentinel unit.
+        """
+        padded = np.concatenate([per_unit, np.zeros_like(per_unit[:, :1])], axis=1)
+        return padded[:, self.cell_units]
+
+    def _pass(self, codes):
+        """Apply every rule once to a batch of candidate masks. Returns the new
+        masks and a boolean array of the puzzles found to have no solution.
+        """
+        popcount = self.popcount
+        counts = popcount(codes)
+        solved = np.where(counts == 1, codes, 0)
+
+        # elimination: drop the digits placed in any unit of an unsolved box
+        unit_solved = solved[:, self.units]
+        placed = np.bitwise_or.reduce(unit_solved, axis=2)
+        invalid = (unit_solved.sum(axis=2) != placed).any(axis=1)
+        taken = np.bitwise_or.reduce(self._gather_units(placed), axis=2)
+        codes = np.where(counts == 1, codes, codes & ~taken)
+
+        # only choice: a digit with a single place in a unit goes there
+        unit_codes = codes[:, self.units]
+        once = np.zeros_like(placed)
+        twice = np.zeros_like(placed)
+        for k in range(unit_codes.shape[2]):
+            twice |= once & unit_codes[:, :, k]
+            once |= unit_codes[:, :, k]
+        invalid |= (once != self.all_digits).any(axis=1)
+        single = np.bitwise_or.reduce(self._gather_units(once & ~twice), axis=2) & codes
+        num_single = popcount(single)
+        invalid |= (num_single > 1).any(axis=1)
+        codes = np.where(num_single == 1, single, codes)
+
+        # naked pairs: two boxes of a unit with the same two candidates
+        counts = popcount(codes)
+        unit_codes = codes[:, self.units]
+        pairs = counts[:, self.units] == 2
+        twin = ((unit_codes[..., :, None] == unit_codes[..., None, :]) & pairs[..., None] &
+                self.not_self).any(axis=3)
+        remove = np.bitwise_or.reduce(np.where(twin, unit_codes, 0), axis=2)
+        remove = np.where(twin, 0, remove[..., None])
+        box_remove = np.zeros_like(codes)
+        np.bitwise_or.at(box_remove.T, self.units.ravel(),
+                         remove.reshape(len(codes), -1).T)
+        codes = np.where(counts >= 2, codes & ~box_remove, codes)
+
+        invalid |= (codes == 0).any(axis=1)
+        return codes, invalid
+
+    def propagate(self, cand):
+        """Propagate a batch until no puzzle changes.
+        Returns:
+            The reduced candidates and a boolean array of the puzzles that have no solution.
+        """
+        codes, invalid = self._propagate(self.to_masks(cand))
+        return self.from_masks(codes), invalid
+
+    def _propagate(self, codes):
+        codes = codes.copy()
+        invalid = np.zeros(len(codes), dtype=bool)
+        active = np.arange(len(codes))
+        for _ in range(self.max_passes):
+            if not len(active):
+                break
+            before = codes[active]
+            after, failed = self._pass(before)
+            codes[active] = after
+            invalid[active] |= failed
+            changed = (before != after).any(axis=1) & ~failed
+            active = active[changed]
+        return codes, invalid
+
+    def solve(self, grids):
+        """Solve a list of grid strings.
+        Returns:
+            A list with the solved list of masks of each puzzle, or False for
+            the puzzles that have no solution.
+        """
+        if not grids:
+            return []
+        codes = np.array([self.tables.parse(grid) for grid in grids], dtype=np.int64)
+        codes, invalid = self._propagate(codes)
+        masks = codes.tolist()
+        popcount = self.tables.popcount
+        results = []
+        for cells, failed in zip(masks, invalid):
+            if failed:
+                results.append(False)
+            elif all(popcount[mask] == 1 for mask in cells):
+                results.append(cells)
+            else:
+                results.append(self.search.solve(cells))
+        return results